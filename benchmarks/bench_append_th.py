@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    append_TH_to_street: token/set based matcher versus the re_TH alternation,
+    on typical, long and adversarial inputs.
+
+        python benchmarks/bench_append_th.py
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressFormatter
+from sample_addresses import SAMPLE_ADDRESSES
+
+CASES = [
+    ('typical', list(SAMPLE_ADDRESSES) + ['West 23 Street', '5 Ave', 'East 125 St.']),
+    ('long', [' '.join(['Lorem'] * 200) + ' 23 Street', ' '.join(['Lorem'] * 200) + ' Foo']),
+    #a number followed by whitespace at every position the regex has to try
+    ('adversarial', [' '.join(['12'] * 500) + ' Streex', ' '.join(['12'] * 500) + ' 12 St']),
+    ]
+
+
+def append_TH_regex(formatter, addr):
+    #the previous implementation, kept for comparison
+    addr = addr.strip()
+    match = formatter.re_TH.search(addr)
+    if match:
+        repl = '%s %s' % (formatter.st_nd_th_convert(match.group(1)), match.group(2))
+        addr = addr.replace(match.group(0), repl)
+    return addr
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--number', type='int', dest='number', default=200)
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    opts, args = optp.parse_args()
+
+    formatter = StreetAddressFormatter()
+    for name, inputs in CASES:
+        for a in inputs:
+            assert append_TH_regex(formatter, a) == formatter.append_TH_to_street(a), a
+
+        def run_regex():
+            for a in inputs:
+                append_TH_regex(formatter, a)
+
+        def run_index():
+            for a in inputs:
+                formatter.append_TH_to_street(a)
+
+        t_re = min(timeit.repeat(run_regex, number=opts.number, repeat=opts.repeat))
+        t_ix = min(timeit.repeat(run_index, number=opts.number, repeat=opts.repeat))
+        n = float(len(inputs) * opts.number)
+        print('%-12s regex: %8.2f us/call   index: %8.2f us/call   (%.1fx)' % (
+            name, t_re / n * 1e6, t_ix / n * 1e6, t_re / t_ix))
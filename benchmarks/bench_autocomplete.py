@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    StreetIndex: build, save and load time, and prefix query latency over a
+    large number of distinct synthetic streets.
+
+        python benchmarks/bench_autocomplete.py --n 2000000
+"""
+
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from streetaddress.autocomplete import StreetIndex
+
+SYLLABLES = ['ar', 'ben', 'cor', 'dal', 'el', 'fen', 'gar', 'hol', 'is', 'jun',
+             'kel', 'lin', 'mar', 'nor', 'os', 'pen', 'quin', 'ros', 'sel', 'tor']
+TYPES = ['St', 'Ave', 'Rd', 'Blvd', 'Ln', 'Dr', 'Ct', 'Pl', 'Way', 'Ter']
+
+
+def synthetic_streets(n, seed=0):
+    rnd = random.Random(seed)
+    for i in range(n):
+        name = ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4))).title()
+        yield {
+            'house' : str(rnd.randint(1, 9999)),
+            'street_name' : name,
+            'street_full' : '%s %d %s' % (name, i, rnd.choice(TYPES)),
+            }
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=1000000)
+    optp.add_option('--queries', type='int', dest='queries', default=20000)
+    opts, args = optp.parse_args()
+
+    #streets are already formatted, so skip the formatter
+    index = StreetIndex(formatter=False)
+    t = time.time()
+    index.add_many(synthetic_streets(opts.n))
+    index.complete('')
+    print('build                    : %8.2f s (%d streets)' % (time.time() - t, len(index)))
+
+    tmp = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmp, 'streets.idx')
+        t = time.time()
+        index.save(path)
+        print('save                     : %8.2f s (%.1f MB)' % (time.time() - t, os.path.getsize(path) / 1e6))
+        t = time.time()
+        index = StreetIndex.load(path, formatter=False)
+        print('load                     : %8.2f s' % (time.time() - t))
+    finally:
+        shutil.rmtree(tmp)
+
+    rnd = random.Random(1)
+    prefixes = [''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(1, 3)))
+                for _ in range(opts.queries)]
+    for label, options in (('street_full', {}),
+                           ('street_name', {'field': 'street_name'}),
+                           ('full + house range', {'house_range': (100, 200)})):
+        t = time.time()
+        for prefix in prefixes:
+            index.complete(prefix, **options)
+        print('query %-19s: %8.1f us' % (label, (time.time() - t) / len(prefixes) * 1e6))
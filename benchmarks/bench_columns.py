@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    parse_columns versus parsing to dicts and pivoting them into columns.
+
+        python benchmarks/bench_columns.py --n 200000
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressParser
+from streetaddress.streetaddress import ADDRESS_FIELDS
+from sample_addresses import make_corpus
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=200000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    opts, args = optp.parse_args()
+
+    corpus = make_corpus(opts.n)
+    parser = StreetAddressParser()
+
+    def dicts_then_pivot():
+        rows = [parser.parse(a) for a in corpus]
+        return dict((f, [r[f] for r in rows]) for f in ADDRESS_FIELDS)
+
+    def columns():
+        return parser.parse_columns(corpus)
+
+    assert dicts_then_pivot() == columns()
+    t_pivot = min(timeit.repeat(dicts_then_pivot, number=1, repeat=opts.repeat))
+    t_cols = min(timeit.repeat(columns, number=1, repeat=opts.repeat))
+    print('dicts + pivot : %10.0f rec/s' % (opts.n / t_pivot))
+    print('parse_columns : %10.0f rec/s (%.2fx)' % (opts.n / t_cols, t_pivot / t_cols))
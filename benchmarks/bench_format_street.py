@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    StreetAddressFormatter.format_street versus chaining append_TH_to_street,
+    abbrev_direction and abbrev_street_avenue_etc.
+
+        python benchmarks/bench_format_street.py --n 200000
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressFormatter, StreetAddressParser
+from sample_addresses import make_corpus
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=200000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    opts, args = optp.parse_args()
+
+    parser = StreetAddressParser()
+    formatter = StreetAddressFormatter()
+    streets = [parser.parse(a)['street_full'] or '' for a in make_corpus(opts.n)]
+
+    for suffix in ('last', 'all'):
+        def chained():
+            for s in streets:
+                s = formatter.append_TH_to_street(s)
+                s = formatter.abbrev_direction(s)
+                formatter.abbrev_street_avenue_etc(s, abbrev_only_last_token=(suffix == 'last'))
+
+        def fused():
+            for s in streets:
+                formatter.format_street(s, suffix=suffix)
+
+        t_chain = min(timeit.repeat(chained, number=1, repeat=opts.repeat))
+        t_fused = min(timeit.repeat(fused, number=1, repeat=opts.repeat))
+        print('suffix=%-4s chained: %10.0f rec/s   format_street: %10.0f rec/s (%.2fx)' % (
+            suffix, opts.n / t_chain, opts.n / t_fused, t_chain / t_fused))
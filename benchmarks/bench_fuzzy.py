@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Cost of fuzzy street type matching: parse throughput with fuzzy off and
+    on over a corpus where some street types are misspelled, and the cost
+    of one deletion index lookup versus a linear scan of the vocabulary.
+
+        python benchmarks/bench_fuzzy.py --n 100000
+"""
+
+import os
+import random
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressParser
+from streetaddress.fuzzy import osa_distance
+from streetaddress.streetaddress import make_fuzzy_matcher
+from corpus import generate_addresses
+
+
+def misspell(rnd, word):
+    i = rnd.randrange(len(word))
+    r = rnd.random()
+    if r < 0.5:
+        return word[:i] + word[i+1:]
+    return word[:i] + rnd.choice('aeiourst') + word[i:]
+
+
+def misspelled_corpus(n, rate, seed=0):
+    rnd = random.Random(seed)
+    res = []
+    for addr in generate_addresses(n, seed):
+        words = addr.split()
+        long_words = [i for i, w in enumerate(words) if len(w) >= 6 and w.isalpha()]
+        if long_words and rnd.random() < rate:
+            i = rnd.choice(long_words)
+            words[i] = misspell(rnd, words[i])
+        res.append(' '.join(words))
+    return res
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=100000)
+    optp.add_option('--rate', type='float', dest='rate', default=0.05,
+                    help='share of addresses with a misspelled word')
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    opts, args = optp.parse_args()
+
+    corpus = misspelled_corpus(opts.n, opts.rate)
+    for label, options in (('fuzzy off', {}),
+                           ('fuzzy on', {'fuzzy': True}),
+                           ('fuzzy off, no token cache', {'token_cache_size': 0}),
+                           ('fuzzy on, no token cache', {'fuzzy': True, 'token_cache_size': 0})):
+        parser = StreetAddressParser(**options)
+        parse = parser.parse
+        t = min(timeit.repeat(lambda: [parse(a) for a in corpus], number=1, repeat=opts.repeat))
+        print('%-27s: %10.0f rec/s' % (label, opts.n / t))
+
+    matcher = make_fuzzy_matcher()
+    words = sorted(matcher.tags)
+    queries = ['stret', 'avenu', 'blvrd', 'apartmnt', 'washington', 'pennsylvania']
+    n = 2000
+    t_index = timeit.timeit(lambda: [matcher.lookup(q) for q in queries], number=n)
+    t_scan = timeit.timeit(lambda: [[w for w in words if osa_distance(q, w) <= 1] for q in queries],
+                           number=max(1, n // 200))
+    print('deletion index lookup      : %8.2f us' % (t_index / n / len(queries) * 1e6))
+    print('linear scan (%d words)    : %8.2f us' % (len(words),
+                                                    t_scan / max(1, n // 200) / len(queries) * 1e6))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Bytes per record held in memory for dict results versus ParsedAddress
+    (compact=True). Requires Python 3.4+ (tracemalloc).
+
+        python benchmarks/bench_memory.py --n 200000
+"""
+
+import gc
+import os
+import sys
+import tracemalloc
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressParser
+from sample_addresses import make_corpus
+
+
+def retained_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    held = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del held
+    return after - before
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=200000)
+    opts, args = optp.parse_args()
+
+    #distinct strings per record, as when reading rows from a file
+    corpus = [a + ' ' for a in make_corpus(opts.n)]
+    parser = StreetAddressParser()
+
+    b_dict = retained_bytes(lambda: [parser.parse(a) for a in corpus])
+    b_compact = retained_bytes(lambda: [parser.parse(a, compact=True) for a in corpus])
+    print('dict          : %6.1f bytes/record' % (b_dict / float(opts.n)))
+    print('ParsedAddress : %6.1f bytes/record (%.0f%% of dict)' % (
+        b_compact / float(opts.n), 100.0 * b_compact / b_dict))
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Series.streetaddress.parse() (factorize, parse the distinct values,
+    broadcast) versus parsing every row with Series.map. Needs pandas.
+
+        python benchmarks/bench_pandas.py --n 1000000 --distinct 20000
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+import streetaddress.pandas_ext
+from streetaddress import StreetAddressParser
+from streetaddress.streetaddress import ADDRESS_FIELDS
+from corpus import generate_addresses
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=1000000)
+    optp.add_option('--distinct', type='int', dest='distinct', default=20000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=3)
+    opts, args = optp.parse_args()
+
+    distinct = generate_addresses(opts.distinct)
+    series = pd.Series([distinct[i * 7919 % opts.distinct] for i in range(opts.n)])
+    parser = StreetAddressParser()
+
+    def per_row():
+        rows = series.map(parser.parse).tolist()
+        return pd.DataFrame(rows, index=series.index, columns=list(ADDRESS_FIELDS), dtype=object)
+
+    def accessor():
+        return series.streetaddress.parse(parser=parser)
+
+    assert per_row().equals(accessor())
+    t_rows = min(timeit.repeat(per_row, number=1, repeat=opts.repeat))
+    t_acc = min(timeit.repeat(accessor, number=1, repeat=opts.repeat))
+    print('Series.map(parse)         : %10.0f rows/s' % (opts.n / t_rows))
+    print('series.streetaddress.parse: %10.0f rows/s (%.1fx)' % (opts.n / t_acc, t_rows / t_acc))
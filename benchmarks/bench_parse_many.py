@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Records/sec of StreetAddressParser.parse_many versus calling parse in a loop.
+
+    Run from the repository root:
+
+        python benchmarks/bench_parse_many.py --n 200000
+"""
+
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressParser
+from sample_addresses import make_corpus
+
+
+def bench(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=200000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    optp.add_option('--chunk-size', type='int', dest='chunk_size', default=1000)
+    opts, args = optp.parse_args()
+
+    corpus = make_corpus(opts.n)
+    parser = StreetAddressParser()
+
+    def loop():
+        for a in corpus:
+            parser.parse(a)
+
+    def batch():
+        for r in parser.parse_many(corpus, chunk_size=opts.chunk_size):
+            pass
+
+    t_loop = bench(loop, opts.repeat)
+    t_batch = bench(batch, opts.repeat)
+    print('parse loop : %10.0f rec/s' % (opts.n / t_loop))
+    print('parse_many : %10.0f rec/s (%.2fx)' % (opts.n / t_batch, t_loop / t_batch))
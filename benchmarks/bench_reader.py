@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Peak memory and time of reading + parsing a large CSV with
+    streetaddress.reader versus readlines() and decoding everything.
+    Each mode runs in a fresh subprocess so peak RSS is comparable (Unix).
+
+        python benchmarks/bench_reader.py --rows 2000000
+"""
+
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+
+def run_mode(mode, path):
+    from streetaddress import StreetAddressParser
+    from streetaddress.reader import iter_field
+    parser = StreetAddressParser()
+    t0 = time.time()
+    n = 0
+    if mode == 'readlines':
+        with open(path, 'rb') as f:
+            lines = f.read().decode('utf-8').splitlines()
+        for line in lines[1:]:
+            parser.parse(line.split(',', 2)[1], compact=True)
+            n += 1
+    else:
+        for offset, addr_str in iter_field(path, 1, skip_header=True):
+            parser.parse(addr_str, compact=True)
+            n += 1
+    elapsed = time.time() - t0
+    #ru_maxrss is in KiB on Linux
+    print('%-10s %9d rows %7.2fs %8.1f MiB peak RSS' % (
+        mode, n, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0))
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--rows', type='int', dest='rows', default=2000000)
+    optp.add_option('--mode', dest='mode', default=None)
+    optp.add_option('--path', dest='path', default=None)
+    opts, args = optp.parse_args()
+
+    if opts.mode:
+        run_mode(opts.mode, opts.path)
+        sys.exit(0)
+
+    from corpus import generate_addresses
+    sample = [a.replace(',', ' ') for a in generate_addresses(10000)]
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('id,address\n')
+            for i in range(opts.rows):
+                f.write('%d,%s\n' % (i, sample[i % len(sample)]))
+        print('input: %.1f MiB' % (os.path.getsize(path) / 1048576.0))
+        for mode in ('readlines', 'mmap'):
+            subprocess.check_call([sys.executable, __file__, '--mode', mode, '--path', path])
+    finally:
+        os.remove(path)
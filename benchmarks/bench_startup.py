@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Import time of the package, construction cost of
+    StreetAddressParser/StreetAddressFormatter, and load time of the default
+    vocabulary pack as JSON source versus compiled.
+
+        python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import timeit
+from optparse import OptionParser
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+IMPORT_SNIPPET = """\
+import time
+t = time.time()
+import streetaddress
+print(time.time() - t)
+"""
+
+
+def import_time(repeat):
+    best = None
+    for _ in range(repeat):
+        out = subprocess.check_output([sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT)
+        t = float(out.decode('ascii').strip())
+        best = t if best is None else min(best, t)
+    return best
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=2000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    opts, args = optp.parse_args()
+
+    from streetaddress import StreetAddressFormatter, StreetAddressParser
+
+    print('import streetaddress      : %8.2f ms' % (import_time(opts.repeat) * 1e3))
+    for cls in (StreetAddressParser, StreetAddressFormatter):
+        t = min(timeit.repeat(cls, number=opts.n, repeat=opts.repeat))
+        print('%-25s: %8.2f us/instance' % (cls.__name__ + '()', t / opts.n * 1e6))
+    formatter = StreetAddressFormatter()
+    t = timeit.timeit(lambda: formatter.append_TH_to_street('West 23 Street'), number=1)
+    print('first append_TH_to_street: %8.2f ms' % (t * 1e3))
+
+    from streetaddress.streetaddress import DEFAULT_VOCABULARY
+    from streetaddress.vocab import compile_vocabulary, load_vocabulary
+    tmp = tempfile.mkdtemp()
+    try:
+        source = os.path.join(tmp, 'default.json')
+        with open(source, 'w') as f:
+            json.dump(DEFAULT_VOCABULARY.to_source(), f)
+        compiled = os.path.join(tmp, 'default.vocab')
+        compile_vocabulary(source, compiled)
+        for label, path in (('JSON source', source), ('compiled', compiled)):
+            t = min(timeit.repeat(lambda: load_vocabulary(path), number=100, repeat=opts.repeat))
+            print('load vocabulary %-11s: %8.2f us' % (label, t / 100 * 1e6))
+    finally:
+        shutil.rmtree(tmp)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Thread scaling of parse_many(executor=ThreadPoolExecutor(n)) with one
+    shared parser. On a standard (GIL) interpreter expect no speedup; run it
+    on a free-threaded build (python3.13t and later) to see parallel parsing.
+
+        python benchmarks/bench_threads.py --n 200000 --threads 1,2,4,8
+        python3.13t benchmarks/bench_threads.py --n 200000 --threads 1,2,4,8
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from streetaddress import StreetAddressParser
+from corpus import generate_addresses
+
+
+def gil_enabled():
+    is_enabled = getattr(sys, '_is_gil_enabled', None)
+    return True if is_enabled is None else is_enabled()
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--n', type='int', dest='n', default=200000)
+    optp.add_option('--threads', dest='threads', default='1,2,4,8')
+    optp.add_option('--chunk-size', type='int', dest='chunk_size', default=1000)
+    optp.add_option('--repeat', type='int', dest='repeat', default=3)
+    opts, args = optp.parse_args()
+
+    corpus = generate_addresses(opts.n)
+    parser = StreetAddressParser()
+    expected = list(parser.parse_many(corpus))
+
+    print('%s, GIL %s, %d CPUs' % (sys.version.split()[0],
+                                   'enabled' if gil_enabled() else 'disabled', os.cpu_count() or 1))
+    base = None
+    for _ in range(opts.repeat):
+        start = time.time()
+        list(parser.parse_many(corpus, chunk_size=opts.chunk_size))
+        elapsed = time.time() - start
+        base = elapsed if base is None else min(base, elapsed)
+    print('no executor : %10.0f rec/s' % (opts.n / base))
+
+    for n_threads in [int(x) for x in opts.threads.split(',')]:
+        with ThreadPoolExecutor(n_threads) as executor:
+            best = None
+            for _ in range(opts.repeat):
+                start = time.time()
+                res = list(parser.parse_many(corpus, chunk_size=opts.chunk_size, executor=executor))
+                elapsed = time.time() - start
+                best = elapsed if best is None else min(best, elapsed)
+            assert res == expected
+        print('%2d threads  : %10.0f rec/s (%.2fx)' % (n_threads, opts.n / best, base / best))
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+"""
+    Deterministic synthetic address corpus for the benchmarks.
+
+    The same (n, seed) always yields the same list of addresses.
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from streetaddress.streetaddress import get_abbrev_suffix_dict, get_text2num_dict
+
+STREET_NAMES = [
+    'Main', 'Oak', 'Pine', 'Maple', 'Cedar', 'Elm', 'Washington', 'Lake', 'Hill',
+    'Pennsylvania', 'Baker', 'Market', 'Union', 'Deer Creek', 'De la Cruz',
+    'Martin Luther King', 'Stierlin', 'Webb', 'Bennet', 'Lincoln', 'Park',
+    ]
+DIRECTIONS = ['North', 'South', 'East', 'West', 'N', 'S', 'E', 'W', 'N.', 'W.']
+SUITE_TYPES = ['Suite', 'Ste', 'Apt', 'Apartment', 'Room', 'Rm', '#']
+CITIES = [('New York', 'NY', '10019'), ('Queens', 'NY', '11354'), ('Reno', 'NV', '89502'),
+          ('San Francisco', 'CA', '94105'), ('Austin', 'TX', '78701')]
+
+
+def _house(rnd, text2num):
+    r = rnd.random()
+    if r < 0.05:
+        return rnd.choice(text2num).title()
+    if r < 0.10:
+        return '%d 1/2' % rnd.randint(1, 999)
+    if r < 0.15:
+        return '%d%s' % (rnd.randint(1, 999), rnd.choice('ABCK'))
+    if r < 0.20:
+        return '%d-%d' % (rnd.randint(1, 200), rnd.randint(1, 99))
+    if r < 0.25:
+        return ''
+    return str(rnd.randint(1, 99999))
+
+
+def _street(rnd, suffixes):
+    r = rnd.random()
+    if r < 0.3:
+        name = '%s %d' % (rnd.choice(DIRECTIONS), rnd.randint(1, 199))
+    elif r < 0.45:
+        n = rnd.randint(1, 199)
+        suffix = 'th' if 10 <= n % 100 <= 20 else {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+        name = '%d%s' % (n, suffix)
+    elif r < 0.55:
+        name = '%s %s' % (rnd.choice(DIRECTIONS), rnd.choice(STREET_NAMES))
+    else:
+        name = rnd.choice(STREET_NAMES)
+    if rnd.random() < 0.9:
+        street_type = rnd.choice(suffixes)
+        if rnd.random() < 0.5:
+            street_type = street_type.title()
+        if rnd.random() < 0.1:
+            street_type += '.'
+        name += ' ' + street_type
+    return name
+
+
+def _suite(rnd):
+    r = rnd.random()
+    if r < 0.8:
+        return ''
+    suite_type = rnd.choice(SUITE_TYPES)
+    num = '%d%s' % (rnd.randint(1, 3000), rnd.choice(['', '', 'A', '-C']))
+    if suite_type == '#':
+        return ', #' + num
+    return ', %s %s' % (suite_type, num)
+
+
+def _noise(rnd, addr):
+    r = rnd.random()
+    if r < 0.05:
+        return addr.upper()
+    if r < 0.10:
+        return addr.lower()
+    if r < 0.15:
+        return '  ' + addr.replace(' ', '  ') + ' '
+    return addr
+
+
+def generate_addresses(n, seed=0):
+    rnd = random.Random(seed)
+    #sorted so that the output does not depend on dict ordering
+    suffixes = sorted(k for k in get_abbrev_suffix_dict() if k)
+    text2num = sorted(get_text2num_dict())
+    res = []
+    for _ in range(n):
+        parts = [_house(rnd, text2num), _street(rnd, suffixes)]
+        addr = ' '.join(p for p in parts if p) + _suite(rnd)
+        if rnd.random() < 0.3:
+            addr += ' %s, %s %s' % rnd.choice(CITIES)
+        res.append(_noise(rnd, addr))
+    return res
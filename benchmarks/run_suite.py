@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    Benchmark suite over the synthetic corpus, with regression thresholds.
+
+        python benchmarks/run_suite.py                    # compare to baseline.json
+        python benchmarks/run_suite.py --save-baseline    # record a new baseline
+        python benchmarks/run_suite.py --json results.json --sizes 1000,10000
+
+    Every benchmark is timed at each corpus size. Each timing loops the
+    benchmark for at least --min-time seconds and is bracketed by two
+    timings of a fixed pure-Python calibration loop; the score is the
+    benchmark time over the calibration time, median of --repeat rounds.
+    Runs on a shared or throttled machine slow both down alike, and a
+    baseline recorded on one machine stays meaningful on another. Timings
+    are also stored as ns per record. A benchmark whose score is more than
+    --tolerance slower than the baseline is measured again up to --retries
+    times, keeping its best score, and fails the run (exit status 1) if it
+    stays slower.
+"""
+
+import json
+import os
+import sys
+import timeit
+from optparse import OptionParser
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+
+from streetaddress import StreetAddressFormatter, StreetAddressParser
+from corpus import generate_addresses
+
+BASELINE_PATH = os.path.join(HERE, 'baseline.json')
+
+
+def _calibration():
+    total = 0
+    for i in range(100000):
+        total += i % 7
+    return total
+
+
+def _loop_count(timer, min_time):
+    #calls of timer's function that take at least min_time
+    number = 1
+    while True:
+        t = timer.timeit(number)
+        if t >= min_time:
+            return number
+        number = max(number * 2, int(number * min_time / max(t, 1e-9) * 1.1))
+
+
+def measure(func, repeat, min_time):
+    #(best seconds per call, score): the score is the median over
+    #`repeat` rounds of calibration, func, calibration
+    timer = timeit.Timer(func)
+    calib_timer = timeit.Timer(_calibration)
+    number = _loop_count(timer, min_time)
+    calib_number = _loop_count(calib_timer, min_time / 2)
+    best = None
+    ratios = []
+    for _ in range(repeat):
+        c1 = calib_timer.timeit(calib_number) / calib_number
+        t = timer.timeit(number) / number
+        c2 = calib_timer.timeit(calib_number) / calib_number
+        ratios.append(t / min(c1, c2))
+        best = t if best is None else min(best, t)
+    ratios.sort()
+    return best, ratios[len(ratios) // 2]
+
+
+def make_benchmarks(parser, formatter, corpus, streets):
+    def each(func, items):
+        return lambda: [func(x) for x in items]
+
+    return [
+        ('parse', each(parser.parse, corpus)),
+        ('parse_compact', each(lambda a: parser.parse(a, compact=True), corpus)),
+        ('parse_many', lambda: list(parser.parse_many(corpus))),
+        ('parse_columns', lambda: parser.parse_columns(corpus)),
+        ('parse_spans', each(parser.parse_spans, corpus)),
+        ('append_TH_to_street', each(formatter.append_TH_to_street, streets)),
+        ('abbrev_direction', each(formatter.abbrev_direction, streets)),
+        ('abbrev_street_avenue_etc', each(formatter.abbrev_street_avenue_etc, streets)),
+        ('abbrev_street_avenue_etc_all',
+            each(lambda s: formatter.abbrev_street_avenue_etc(s, abbrev_only_last_token=False), streets)),
+        ('format_street', each(formatter.format_street, streets)),
+        ]
+
+
+def run(sizes, repeat, seed=0, min_time=0.2, only=None):
+    #only: set of (name, size) to measure, default all
+    calib, _ = measure(_calibration, repeat, min_time)
+    parser = StreetAddressParser()
+    formatter = StreetAddressFormatter()
+    results = {}
+    for size in sizes:
+        corpus = generate_addresses(size, seed)
+        streets = [parser.parse(a)['street_full'] or '' for a in corpus]
+        for name, func in make_benchmarks(parser, formatter, corpus, streets):
+            if only is not None and (name, str(size)) not in only:
+                continue
+            t, score = measure(func, repeat, min_time)
+            results.setdefault(name, {})[str(size)] = {
+                'ns_per_record': t / size * 1e9,
+                'records_per_sec': size / t,
+                'score': score / size * 1e6,
+                }
+    return {'calibration_sec': calib, 'python': sys.version.split()[0], 'results': results}
+
+
+def compare(current, baseline, tolerance, verbose=True):
+    failures = []
+    for name, by_size in sorted(current['results'].items()):
+        for size, cur in sorted(by_size.items(), key=lambda kv: int(kv[0])):
+            base = baseline.get('results', {}).get(name, {}).get(size)
+            if base is None:
+                status = 'new'
+                ratio = None
+            else:
+                ratio = cur['score'] / base['score']
+                status = 'FAIL' if ratio > 1 + tolerance else 'ok'
+                if status == 'FAIL':
+                    failures.append((name, size, ratio))
+            if verbose:
+                print('%-30s %8s %10.0f ns/rec %12.0f rec/s  %s%s' % (
+                    name, size, cur['ns_per_record'], cur['records_per_sec'],
+                    status, '' if ratio is None else ' (%.2fx baseline)' % ratio))
+    return failures
+
+
+if __name__ == '__main__':
+    optp = OptionParser()
+    optp.add_option('--sizes', dest='sizes', default='1000,10000,100000',
+            help='comma separated corpus sizes')
+    optp.add_option('--repeat', type='int', dest='repeat', default=5)
+    optp.add_option('--seed', type='int', dest='seed', default=0)
+    optp.add_option('--min-time', type='float', dest='min_time', default=0.2,
+            help='minimum seconds per timing; short benchmarks are looped')
+    optp.add_option('--tolerance', type='float', dest='tolerance', default=0.25,
+            help='allowed slowdown versus the baseline (0.25 = 25%)')
+    optp.add_option('--retries', type='int', dest='retries', default=2,
+            help='times a benchmark over the tolerance is measured again')
+    optp.add_option('--baseline', dest='baseline', default=BASELINE_PATH)
+    optp.add_option('--save-baseline', action='store_true', dest='save_baseline', default=False)
+    optp.add_option('--json', dest='json', default=None, help='also write results to this file')
+    opts, args = optp.parse_args()
+
+    sizes = [int(s) for s in opts.sizes.split(',')]
+    current = run(sizes, opts.repeat, opts.seed, opts.min_time)
+
+    if opts.json:
+        with open(opts.json, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+
+    if opts.save_baseline:
+        with open(opts.baseline, 'w') as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        compare(current, {}, opts.tolerance)
+        print('baseline written to %s' % opts.baseline)
+        sys.exit(0)
+
+    if not os.path.exists(opts.baseline):
+        compare(current, {}, opts.tolerance)
+        print('no baseline at %s, run with --save-baseline' % opts.baseline)
+        sys.exit(0)
+
+    with open(opts.baseline) as f:
+        baseline = json.load(f)
+    failures = compare(current, baseline, opts.tolerance, verbose=False)
+    for _ in range(opts.retries):
+        if not failures:
+            break
+        only = set((name, size) for name, size, ratio in failures)
+        rerun = run(sorted(set(int(size) for name, size in only)), opts.repeat, opts.seed,
+                    opts.min_time, only)
+        for name, by_size in rerun['results'].items():
+            for size, res in by_size.items():
+                if res['score'] < current['results'][name][size]['score']:
+                    current['results'][name][size] = res
+        failures = compare(current, baseline, opts.tolerance, verbose=False)
+    failures = compare(current, baseline, opts.tolerance)
+    if failures:
+        print('%d benchmark(s) slower than baseline by more than %.0f%%' % (
+            len(failures), opts.tolerance * 100))
+        sys.exit(1)
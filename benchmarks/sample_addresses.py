@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+#same inputs as tests/cmdline_street_address.py, used by the benchmark scripts
+SAMPLE_ADDRESSES = [
+    '3120 De la Cruz Boulevard',
+    '100 South Street',
+    '123 Main',
+    '221B Baker Street',
+    '10 Downing St',
+    '1600 Pennsylvania Ave',
+    '33 1/2 W 42nd St.',
+    '454 N 38 1/2',
+    '21A Deer Run Drive',
+    '256K Memory Lane',
+    '12-1/2 Lincoln',
+    '23N W Loop South',
+    '23 N W Loop South',
+    '25 Main St',
+    '2500 14th St',
+    '12 Bennet Pkwy',
+    'Pearl St',
+    'Bennet Rd and Main St',
+    '19th St',
+    '1500 Deer Creek Lane',
+    '2081 N Webb Rd',
+    '2081 N. Webb Rd',
+    '1515 West 22nd Street',
+    '2029 Stierlin Court',
+    'P.O. Box 33170',
+    'The Landmark @ One Market, Suite 200',
+    'One Market, Suite 200',
+    'One Market',
+    'One Union Square',
+    'One Union Square, Apt 22-C',
+    '186 Avenue A',
+    '10 Avenue of America',
+    '25 West St',
+    '366 West 52nd Street  New York, NY 10019',
+    '135-20 40th ROAD, queens, NY 11354',
+    '22-15 31st St, 11105',
+    ]
+
+
+def make_corpus(n):
+    reps = n // len(SAMPLE_ADDRESSES) + 1
+    return (SAMPLE_ADDRESSES * reps)[:n]
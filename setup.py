@@ -39,6 +39,14 @@ setup(
         url='https://github.com/pnpnpn/street-address',
         packages=['streetaddress'],
         install_requires=[],
+        extras_require={
+            'pandas': ['pandas'],
+            },
+        entry_points={
+            'console_scripts': [
+                'street-address = streetaddress.cli:main',
+                ],
+            },
         test_suite='tests',
         classifiers=CLASSIFIERS)
 
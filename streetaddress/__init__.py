@@ -2,6 +2,7 @@
 
 from .streetaddress import StreetAddressFormatter
 from .streetaddress import StreetAddressParser
+from .streetaddress import ParsedAddress
 
 __title__ = 'streetaddress'
 __version__ = '0.1.1'
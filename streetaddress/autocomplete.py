@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.autocomplete
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Prefix index over parsed streets, for autocompletion.
+
+        index = StreetIndex()
+        index.add_many(parser.parse(a) for a in addresses)
+        index.complete('w 22')                    #['W 22nd St', ...]
+        index.complete('mai', field='street_name', house_range=(100, 200))
+        index.save('streets.idx')
+        index = StreetIndex.load('streets.idx')
+
+    Every distinct street (its formatted street_full) is stored once, with
+    the lowest and highest numeric house number seen on it. Lookups bisect
+    a sorted array of lower case keys, one for street_full and one for
+    street_name, and walk forward while the prefix matches, so a query
+    costs O(log n) plus the matches it returns. The street_name key is the
+    formatted street without its street type ('W 22nd' for 'W 22nd St').
+
+    The saved form is a marshal dump of the arrays and loads without
+    re-sorting.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import marshal
+import re
+from array import array
+from bisect import bisect_left
+
+from .streetaddress import StreetAddressFormatter
+
+#saved index header; bump the digit when the layout changes
+_MAGIC = b'SASTIDX1'
+_NO_HOUSE = -1
+#house numbers beyond what array('l') holds are not recorded
+_HOUSE_MAX = 2 ** (8 * array('l').itemsize - 1) - 1
+
+_rec_house_digits = re.compile(r'^\d+')
+
+
+def _key(text):
+    return ' '.join(text.lower().split())
+
+
+class StreetIndex():
+    def __init__(self, formatter=None, format_options=None):
+        #streets are stored as formatter.format_street(street_full,
+        #**format_options); formatter=False stores street_full as is
+        self.formatter = StreetAddressFormatter() if formatter is None else formatter
+        self.format_options = format_options or {}
+        self._streets = [] #display strings, by street id
+        self._names = []   #street name (see _street_name), by street id
+        self._ids = {}     #lower case street -> street id, see _street_ids
+        self._house_min = array('l')
+        self._house_max = array('l')
+        #sorted (key, street id) arrays, rebuilt lazily after additions
+        self._full_keys = self._full_ids = None
+        self._name_keys = self._name_ids = None
+
+    def __len__(self):
+        return len(self._streets)
+
+    def add(self, addr):
+        """Add a parse() result (dict or ParsedAddress). Returns the street
+        id, or None when it has no street."""
+        street = addr['street_full']
+        if not street:
+            return None
+        if self.formatter:
+            street = self.formatter.format_street(street, **self.format_options)
+        key = _key(street)
+        ids = self._ids
+        if ids is None:
+            ids = self._street_ids()
+        street_id = ids.get(key)
+        if street_id is None:
+            street_id = ids[key] = len(self._streets)
+            self._streets.append(street)
+            self._names.append(self._street_name(addr, street))
+            self._house_min.append(_NO_HOUSE)
+            self._house_max.append(_NO_HOUSE)
+            self._full_keys = self._name_keys = None
+
+        match = _rec_house_digits.match(addr['house'] or '')
+        if match is not None:
+            house = int(match.group())
+            if house <= _HOUSE_MAX:
+                lo = self._house_min[street_id]
+                if lo == _NO_HOUSE or house < lo:
+                    self._house_min[street_id] = house
+                if house > self._house_max[street_id]:
+                    self._house_max[street_id] = house
+        return street_id
+
+    def _street_name(self, addr, street):
+        #the name as it appears in the stored street, so that 'West 22
+        #Street' and 'W 22nd St' share the name 'W 22nd'
+        if not self.formatter:
+            return addr['street_name'] or street
+        if addr['street_type'] and ' ' in street:
+            return street.rsplit(' ', 1)[0]
+        return street
+
+    def add_many(self, addrs):
+        for addr in addrs:
+            self.add(addr)
+
+    def complete(self, prefix, limit=10, field='street_full', house_range=None):
+        """Up to `limit` streets whose `field` ('street_full' or
+        'street_name') starts with `prefix` (case and spacing insensitive),
+        in alphabetical order of that field. A trailing space in `prefix`
+        requires the last word to be complete. With house_range=(lo, hi),
+        only streets with a known house number range overlapping [lo, hi]."""
+        if self._full_keys is None:
+            self._build()
+        if field == 'street_full':
+            keys, ids = self._full_keys, self._full_ids
+        elif field == 'street_name':
+            keys, ids = self._name_keys, self._name_ids
+        else:
+            raise ValueError("field must be 'street_full' or 'street_name'")
+
+        #a trailing space ends the last word: 'main ' does not match 'Maine'
+        ends_word = prefix[-1:].isspace()
+        prefix = _key(prefix)
+        if ends_word and prefix:
+            prefix += ' '
+        start = bisect_left(keys, prefix)
+        end = bisect_left(keys, prefix + u'\U0010ffff', start)
+        streets = self._streets
+        if house_range is None:
+            return [streets[street_id] for street_id in ids[start:min(end, start + limit)]]
+
+        lo, hi = house_range
+        house_min, house_max = self._house_min, self._house_max
+        res = []
+        for street_id in ids[start:end]:
+            if house_max[street_id] < lo or house_min[street_id] > hi or house_min[street_id] == _NO_HOUSE:
+                continue
+            res.append(streets[street_id])
+            if len(res) >= limit:
+                break
+        return res
+
+    def house_range(self, street):
+        """(lowest, highest) house number seen on `street` (as stored), or
+        None."""
+        ids = self._ids
+        if ids is None:
+            ids = self._street_ids()
+        street_id = ids.get(_key(street))
+        if street_id is None or self._house_min[street_id] == _NO_HOUSE:
+            return None
+        return self._house_min[street_id], self._house_max[street_id]
+
+    def _street_ids(self):
+        #after load(), built on first use only
+        self._ids = dict(zip(self._full_keys, self._full_ids))
+        return self._ids
+
+    def _build(self):
+        full = sorted((_key(s), i) for i, s in enumerate(self._streets))
+        self._full_keys = [k for k, i in full]
+        self._full_ids = array('l', [i for k, i in full])
+        #ties on the name are broken by the full street
+        streets = self._streets
+        names = sorted((_key(n), _key(streets[i]), i) for i, n in enumerate(self._names))
+        self._name_keys = [k for k, f, i in names]
+        self._name_ids = array('l', [i for k, f, i in names])
+
+    ####################################################################
+    # Saved form
+    ####################################################################
+
+    def save(self, path):
+        if self._full_keys is None:
+            self._build()
+        data = marshal.dumps((
+            self._streets,
+            self._names,
+            self._house_min.tobytes(),
+            self._house_max.tobytes(),
+            self._full_keys,
+            self._full_ids.tobytes(),
+            self._name_keys,
+            self._name_ids.tobytes(),
+            array('l').itemsize,
+            ))
+        with open(path, 'wb') as f:
+            f.write(_MAGIC)
+            f.write(data)
+
+    @classmethod
+    def load(cls, path, formatter=None, format_options=None):
+        #formatter/format_options only matter for streets added later
+        with open(path, 'rb') as f:
+            data = f.read()
+        if not data.startswith(_MAGIC):
+            raise ValueError('not a street index')
+        try:
+            fields = marshal.loads(data[len(_MAGIC):])
+        except (EOFError, ValueError, TypeError):
+            raise ValueError('corrupt street index, or saved by another Python version')
+        (streets, names, house_min, house_max, full_keys, full_ids,
+         name_keys, name_ids, itemsize) = fields
+        if itemsize != array('l').itemsize:
+            raise ValueError('street index saved on a different platform')
+
+        index = cls(formatter, format_options)
+        index._streets = streets
+        index._names = names
+        for attr, raw in (('_house_min', house_min), ('_house_max', house_max),
+                          ('_full_ids', full_ids), ('_name_ids', name_ids)):
+            arr = array('l')
+            arr.frombytes(raw)
+            setattr(index, attr, arr)
+        index._full_keys = full_keys
+        index._name_keys = name_keys
+        index._ids = None
+        return index
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.cache
+    ~~~~~~~~~~~~~~~~~~~
+
+    Bounded LRU cache used to memoize parse results.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+_MISSING = object()
+
+
+class LRUCache():
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('maxsize must be >= 1')
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._data.pop(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            #re-insert to mark as most recently used
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            data = self._data
+            if key in data:
+                del data[key]
+            elif len(data) >= self.maxsize:
+                data.popitem(last=False)
+                self.evictions += 1
+            data[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+
+class ReadOnlyDict(dict):
+    """A dict that refuses modification, so cached results can be shared."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError('%s is read-only' % type(self).__name__)
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def copy(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return (type(self), (dict(self),))
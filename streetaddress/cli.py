@@ -0,0 +1,640 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.cli
+    ~~~~~~~~~~~~~~~~~
+
+    Command line entry point (installed as ``street-address``).
+
+        street-address parse addresses.csv --column address --workers 8 -o out.csv
+        street-address parse big.csv -o out.csv --checkpoint out.ckpt
+        street-address parse daily.csv -o out.csv --manifest daily.manifest --key id
+        street-address compile-vocab regional.json regional.vocab
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import argparse
+import codecs
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import os
+import sys
+from collections import deque
+from itertools import islice
+
+from .metrics import LatencyHistogram, perf_counter as _perf_counter
+from .streetaddress import ADDRESS_FIELDS, StreetAddressFormatter, StreetAddressParser
+from .vocab import compile_vocabulary, load_vocabulary
+
+PARSED_FIELDS = [
+    'house', 'street_name', 'street_type', 'street_full',
+    'suite_num', 'suite_type', 'other', 'street_formatted',
+    ]
+
+FORMATS = ('csv', 'tsv', 'jsonl')
+STREAM_FORMATS = ('jsonl', 'csv', 'tsv')
+
+########################################################################
+# Worker side
+########################################################################
+
+#one parser/formatter per worker process, created by _init_worker
+_parser = None
+_formatter = None
+
+
+def _init_worker(vocabulary_path=None):
+    #workers get the pack's path: compiled packs load faster than they pickle
+    global _parser, _formatter
+    vocabulary = load_vocabulary(vocabulary_path) if vocabulary_path else None
+    _parser = StreetAddressParser(vocabulary=vocabulary)
+    _formatter = StreetAddressFormatter(vocabulary=vocabulary)
+
+
+def _address_text(value):
+    #JSON values may be numbers (parsed as their text), or lists, objects
+    #and booleans (no address)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return None
+
+
+def _parse_fields(addr_str):
+    addr = _parser.parse(addr_str or '')
+    street = addr['street_full']
+    if street is not None:
+        street = _formatter.format_street(street)
+    addr['street_formatted'] = street
+    return addr
+
+
+def _process_chunk(task):
+    #rows are parsed and serialized in the worker so that the parent only
+    #has to write out the returned text, in order; `tag` is passed through
+    fmt, column, rows, tag = task
+    if fmt == 'jsonl':
+        results = [_parse_fields(_address_text(row.get(column))) for row in rows]
+    else:
+        results = [_parse_fields(row[column] if column < len(row) else None) for row in rows]
+    return _format_rows(fmt, rows, results), len(rows), tag
+
+
+def _format_rows(fmt, rows, results):
+    #input rows with their parsed fields appended, as output text
+    out = io.StringIO()
+    if fmt == 'jsonl':
+        for row, addr in zip(rows, results):
+            row.update(addr)
+            out.write(json.dumps(row, ensure_ascii=False))
+            out.write(u'\n')
+    else:
+        writer = csv.writer(out, delimiter=_delimiter(fmt), lineterminator='\n')
+        for row, addr in zip(rows, results):
+            writer.writerow(row + [_csv_value(addr[f]) for f in PARSED_FIELDS])
+    return out.getvalue()
+
+
+def _csv_value(value):
+    return u'' if value is None else value
+
+
+def _delimiter(fmt):
+    return '\t' if fmt == 'tsv' else ','
+
+########################################################################
+# Driver side
+########################################################################
+
+def _guess_format(path):
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in ('json', 'ndjson'):
+        return 'jsonl'
+    if ext in FORMATS:
+        return ext
+    return 'csv'
+
+
+def _decoded_lines(fp, encoding):
+    decode = codecs.getincrementaldecoder(encoding)().decode
+    for raw in fp:
+        yield decode(raw)
+
+
+class _OffsetLines():
+    """Decoded lines of a binary file, tracking the byte offset just past
+    the last line handed out (the csv module reads no further than the
+    lines of the record it returns)."""
+
+    def __init__(self, fp, encoding):
+        self.fp = fp
+        self.offset = 0
+        self._encoding = encoding
+        self._decode = codecs.getincrementaldecoder(encoding)().decode
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        raw = self.fp.readline()
+        if not raw:
+            raise StopIteration
+        self.offset += len(raw)
+        return self._decode(raw)
+
+    next = __next__
+
+    def seek(self, offset):
+        self.fp.seek(offset)
+        self.offset = offset
+        self._decode = codecs.getincrementaldecoder(self._encoding)().decode
+
+
+def _ordered_map(pool, func, tasks, window):
+    #like pool.imap, but never reads more than `window` tasks ahead of the
+    #consumer, so memory stays bounded on inputs of any size
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.apply_async(func, (task,)))
+        if len(pending) >= window:
+            yield pending.popleft().get()
+    while pending:
+        yield pending.popleft().get()
+
+
+def _tagged_chunks(rows, size, lines):
+    #chunks of rows, each tagged with the input offset just past its last row
+    it = iter(rows)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            break
+        yield chunk, lines.offset
+
+
+def _json_row(line):
+    #a JSONL row must be an object; anything else is passed through as an
+    #error record (with no address) so that the run keeps going
+    row = json.loads(line)
+    if not isinstance(row, dict):
+        row = {'row': row, 'error': 'not a JSON object'}
+    return row
+
+
+def _read_rows(lines, out_fp, fmt, columns, has_header, start_offset=0):
+    #returns (row iterator, `columns` as JSON keys or CSV indices), after
+    #writing the output header row unless resuming; (None, None) on empty input
+    if fmt == 'jsonl':
+        if start_offset:
+            lines.seek(start_offset)
+        return (_json_row(l) for l in lines if l.strip()), columns
+
+    reader = csv.reader(lines, delimiter=_delimiter(fmt))
+    if has_header:
+        header = next(reader, None)
+        if header is None:
+            return None, None
+        for column in columns:
+            if column not in header:
+                raise ValueError('column %r not found in header' % column)
+        columns = [header.index(column) for column in columns]
+        if not start_offset:
+            writer = csv.writer(out_fp, delimiter=_delimiter(fmt), lineterminator='\n')
+            writer.writerow(header + PARSED_FIELDS)
+    else:
+        columns = [int(column) for column in columns]
+    if start_offset:
+        lines.seek(start_offset)
+    return reader, columns
+
+
+def run_parse(in_fp, out_fp, fmt, column='address', has_header=True,
+              workers=1, chunk_size=1000, encoding='utf-8',
+              start_offset=0, on_chunk=None, vocabulary_path=None):
+    """Parse the address column of `in_fp` (binary) and write rows with the
+    parsed fields appended to `out_fp` (text), preserving input order.
+    Returns the number of records written.
+
+    With `start_offset` > 0 (resuming), input is read from that byte
+    offset and the header row is not written again. `on_chunk(rows,
+    input_offset)` is called after each chunk of output has been written,
+    with the input offset just past the chunk's last row. `vocabulary_path`
+    is a vocabulary pack file, see vocab.py."""
+    lines = _OffsetLines(in_fp, encoding)
+    rows, columns = _read_rows(lines, out_fp, fmt, [column], has_header, start_offset)
+    if rows is None:
+        return 0
+    column = columns[0]
+
+    tasks = ((fmt, column, chunk, offset) for chunk, offset in _tagged_chunks(rows, chunk_size, lines))
+
+    pool = None
+    if workers <= 1:
+        _init_worker(vocabulary_path)
+        results = (_process_chunk(t) for t in tasks)
+    else:
+        pool = multiprocessing.Pool(workers, initializer=_init_worker,
+                                    initargs=(vocabulary_path,))
+        results = _ordered_map(pool, _process_chunk, tasks, 2 * workers)
+
+    count = 0
+    try:
+        for text, n_rows, offset in results:
+            out_fp.write(text)
+            count += n_rows
+            if on_chunk is not None:
+                on_chunk(n_rows, offset)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    return count
+
+
+class Checkpoint():
+    """Periodic, atomically replaced record of how far a `parse` job got:
+    input offset, output offset and row count. Output up to the recorded
+    offset corresponds exactly to input up to the recorded offset."""
+
+    def __init__(self, path, every=100000):
+        self.path = path
+        self.every = every
+        self.state = None
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path) as f:
+            self.state = json.load(f)
+        return self.state
+
+    def save(self, state):
+        #write-then-rename, so a crash never leaves a torn checkpoint
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(state, f, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.state = state
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def run_parse_file(input_path, output_path, fmt=None, checkpoint_path=None,
+                   checkpoint_every=100000, encoding='utf-8', **options):
+    """run_parse() between two files. With `checkpoint_path`, progress is
+    checkpointed every `checkpoint_every` rows and an interrupted job is
+    resumed from its last checkpoint: the output is truncated back to the
+    checkpointed offset and input is read from the matching offset, so each
+    input row is written exactly once and in order. The checkpoint is
+    removed when the job completes. Returns the total number of records."""
+    fmt = fmt or _guess_format(input_path)
+    job = {'input': os.path.abspath(input_path), 'format': fmt,
+           'column': str(options.get('column', 'address')),
+           'vocabulary': options.get('vocabulary_path')}
+
+    checkpoint = Checkpoint(checkpoint_path, checkpoint_every) if checkpoint_path else None
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None and state.get('job') != job:
+        raise ValueError('checkpoint %s belongs to a different job' % checkpoint_path)
+
+    if state is not None and os.path.exists(output_path):
+        out_raw = open(output_path, 'r+b')
+        out_raw.truncate(state['output_offset'])
+        out_raw.seek(state['output_offset'])
+    else:
+        state = None
+        out_raw = open(output_path, 'wb')
+    out_fp = io.TextIOWrapper(out_raw, encoding=encoding, newline='')
+
+    progress = {'rows': state['rows'] if state else 0, 'since': 0}
+
+    def on_chunk(n_rows, input_offset):
+        progress['rows'] += n_rows
+        progress['since'] += n_rows
+        if checkpoint is not None and progress['since'] >= checkpoint.every:
+            out_fp.flush()
+            os.fsync(out_raw.fileno())
+            checkpoint.save({'job': job, 'input_offset': input_offset,
+                             'output_offset': out_raw.tell(), 'rows': progress['rows']})
+            progress['since'] = 0
+
+    with open(input_path, 'rb') as in_fp:
+        try:
+            run_parse(in_fp, out_fp, fmt, encoding=encoding,
+                      start_offset=state['input_offset'] if state else 0,
+                      on_chunk=on_chunk, **options)
+        finally:
+            out_fp.close()
+    if checkpoint is not None:
+        checkpoint.remove()
+    return progress['rows']
+
+
+def run_parse_incremental(in_fp, out_fp, manifest, fmt, key, column='address',
+                          has_header=True, chunk_size=1000, encoding='utf-8'):
+    """Like run_parse(), single process, but only rows whose `key` is new
+    or whose address changed since the last run are parsed; the others
+    reuse the results stored in `manifest` (incremental.Manifest). The
+    output is complete either way. Returns the number of records written."""
+    lines = _OffsetLines(in_fp, encoding)
+    rows, columns = _read_rows(lines, out_fp, fmt, [key, column], has_header)
+    if rows is None:
+        manifest.finish()
+        return 0
+    key, column = columns
+
+    if fmt == 'jsonl':
+        get = lambda row, i: row.get(i)
+    else:
+        get = lambda row, i: row[i] if i < len(row) else None
+    pending = []
+    def records():
+        for row in rows:
+            pending.append(row)
+            yield get(row, key), _address_text(get(row, column))
+
+    count = 0
+    chunk = []
+    for k, addr, reused in manifest.parse_records(records(), chunk_size):
+        chunk.append(addr)
+        if len(chunk) >= chunk_size:
+            out_fp.write(_format_rows(fmt, pending[:len(chunk)], chunk))
+            del pending[:len(chunk)]
+            count += len(chunk)
+            chunk = []
+    out_fp.write(_format_rows(fmt, pending[:len(chunk)], chunk))
+    return count + len(chunk)
+
+
+def run_stream(lines, out_fp, out_format='jsonl', ordinal=False, direction=False,
+               suffix=None, batch_size=1000, histogram=None, vocabulary=None):
+    """Parse one address per line from `lines` and write JSONL/CSV/TSV to
+    `out_fp`. The formatter stages only run when requested. Output is
+    written once per `batch_size` records. Per-record latency goes into
+    `histogram` if given. Returns the number of records written."""
+    parser = StreetAddressParser(vocabulary=vocabulary)
+    formatter = StreetAddressFormatter(vocabulary=vocabulary)
+    do_format = ordinal or direction or suffix is not None
+    fields = ['input'] + list(ADDRESS_FIELDS)
+    if do_format:
+        fields.append('street_formatted')
+
+    buf = io.StringIO()
+    if out_format == 'jsonl':
+        writer = None
+    else:
+        writer = csv.writer(buf, delimiter=_delimiter(out_format), lineterminator='\n')
+        writer.writerow(fields)
+
+    parse = parser.parse
+    format_street = formatter.format_street
+    clock = _perf_counter
+    add_latency = histogram.add if histogram is not None else None
+
+    count = 0
+    pending = 0
+    for line in lines:
+        addr_str = line.strip()
+        if not addr_str:
+            continue
+        if add_latency is not None:
+            t0 = clock()
+        addr = parse(addr_str)
+        if do_format:
+            street = addr['street_full']
+            if street is not None:
+                street = format_street(street, ordinal, direction, suffix)
+            addr['street_formatted'] = street
+        if add_latency is not None:
+            add_latency(clock() - t0)
+
+        if writer is None:
+            addr['input'] = addr_str
+            buf.write(json.dumps(addr, ensure_ascii=False, sort_keys=True))
+            buf.write(u'\n')
+        else:
+            writer.writerow([addr_str] + [_csv_value(addr[f]) for f in fields[1:]])
+        count += 1
+        pending += 1
+        if pending >= batch_size:
+            out_fp.write(buf.getvalue())
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    out_fp.write(buf.getvalue())
+    out_fp.flush()
+    return count
+
+
+def _open_input(path):
+    if path == '-':
+        return getattr(sys.stdin, 'buffer', sys.stdin)
+    return open(path, 'rb')
+
+
+def _open_output(path, encoding):
+    if path == '-':
+        return sys.stdout
+    return io.open(path, 'w', encoding=encoding, newline='')
+
+
+def _cmd_parse(args):
+    fmt = args.format or _guess_format(args.input)
+    if args.no_header and fmt != 'jsonl':
+        for flag, value in (('--column', args.column), ('--key', args.key)):
+            if value is not None and not value.isdigit():
+                raise SystemExit('usage: with --no-header, %s must be a column index, not %r'
+                                 % (flag, value))
+    options = dict(column=args.column,
+                   has_header=not args.no_header,
+                   workers=args.workers,
+                   chunk_size=args.chunk_size,
+                   vocabulary_path=args.vocabulary)
+    if args.manifest:
+        if args.checkpoint:
+            raise SystemExit('--manifest and --checkpoint cannot be combined')
+        if args.key is None:
+            raise SystemExit('--manifest needs --key')
+        return _cmd_parse_incremental(args, fmt)
+    if args.checkpoint:
+        if args.input == '-' or args.output == '-':
+            raise SystemExit('--checkpoint needs an input and an output file')
+        run_parse_file(args.input, args.output, fmt,
+                       checkpoint_path=args.checkpoint,
+                       checkpoint_every=args.checkpoint_every,
+                       encoding=args.encoding, **options)
+        return 0
+
+    in_fp = _open_input(args.input)
+    out_fp = _open_output(args.output, args.encoding)
+    try:
+        run_parse(in_fp, out_fp, fmt, encoding=args.encoding, **options)
+    finally:
+        if in_fp is not getattr(sys.stdin, 'buffer', sys.stdin):
+            in_fp.close()
+        if out_fp is not sys.stdout:
+            out_fp.close()
+    return 0
+
+
+def _cmd_parse_incremental(args, fmt):
+    #imported here: only incremental runs need sqlite3
+    from .incremental import Manifest
+    vocabulary = load_vocabulary(args.vocabulary) if args.vocabulary else None
+    in_fp = _open_input(args.input)
+    out_fp = _open_output(args.output, args.encoding)
+    try:
+        with Manifest(args.manifest, StreetAddressParser(vocabulary=vocabulary),
+                      StreetAddressFormatter(vocabulary=vocabulary)) as manifest:
+            count = run_parse_incremental(in_fp, out_fp, manifest, fmt, args.key,
+                                          column=args.column,
+                                          has_header=not args.no_header,
+                                          chunk_size=args.chunk_size,
+                                          encoding=args.encoding)
+    finally:
+        if in_fp is not getattr(sys.stdin, 'buffer', sys.stdin):
+            in_fp.close()
+        if out_fp is not sys.stdout:
+            out_fp.close()
+    sys.stderr.write('%d records: %d reused, %d parsed, %d removed%s\n' % (
+        count, manifest.reused, manifest.parsed, manifest.removed,
+        ' (manifest invalidated)' if manifest.invalidated else ''))
+    return 0
+
+
+def _iter_input_lines(paths, encoding):
+    for path in paths or ['-']:
+        in_fp = _open_input(path)
+        try:
+            for line in _decoded_lines(in_fp, encoding):
+                yield line
+        finally:
+            if path != '-':
+                in_fp.close()
+
+
+def _cmd_stream(args):
+    out_fp = _open_output(args.output, args.encoding)
+    histogram = None if args.quiet else LatencyHistogram()
+    start = _perf_counter()
+    try:
+        count = run_stream(_iter_input_lines(args.inputs, args.encoding), out_fp,
+                           out_format=args.format,
+                           ordinal=args.ordinal,
+                           direction=args.direction,
+                           suffix=args.suffix,
+                           batch_size=args.batch_size,
+                           histogram=histogram,
+                           vocabulary=load_vocabulary(args.vocabulary) if args.vocabulary else None)
+    finally:
+        if out_fp is not sys.stdout:
+            out_fp.close()
+    elapsed = _perf_counter() - start
+    if histogram is not None:
+        snap = histogram.snapshot()
+        sys.stderr.write('%d records in %.3fs: %.0f rec/s, p50 %.1f us, p99 %.1f us\n' % (
+            count, elapsed, count / elapsed if elapsed > 0 else 0.0,
+            snap['p50'] * 1e6, snap['p99'] * 1e6))
+    return 0
+
+
+def _cmd_serve(args):
+    #imported here: the server needs asyncio (Python 3.5+)
+    from .server import serve
+    logging.basicConfig(level=logging.INFO, format='%(asctime)-8s %(levelname)-8s %(message)s')
+    serve(host=args.host, port=args.port, unix_path=args.unix,
+          max_batch_size=args.max_batch_size,
+          max_delay=args.max_delay_ms / 1000.0,
+          max_pending=args.max_pending)
+    return 0
+
+
+def _cmd_compile_vocab(args):
+    vocab = compile_vocabulary(args.source, args.output)
+    sys.stderr.write('%s: %d street types, %d number words, %d unit designators, %d directions\n' % (
+        args.output, len(vocab.abbrev_suffix_map), len(vocab.text2num_map),
+        len(vocab.suite_type_set), len(vocab.abbrev_direction_map)))
+    return 0
+
+
+def build_arg_parser():
+    argp = argparse.ArgumentParser(prog='street-address',
+            description='Street address parser and formatter')
+    sub = argp.add_subparsers(dest='command')
+    sub.required = True
+
+    p = sub.add_parser('parse', help='parse the address column of a CSV/TSV/JSONL file')
+    p.add_argument('input', help="input file, or '-' for stdin")
+    p.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    p.add_argument('--format', choices=FORMATS, default=None,
+            help='input/output format (default: from the input file extension)')
+    p.add_argument('--column', default='address',
+            help='address column name (CSV/TSV header or JSON key), or index with --no-header')
+    p.add_argument('--no-header', action='store_true', help='CSV/TSV input has no header row')
+    p.add_argument('-j', '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='number of worker processes (default: number of CPUs)')
+    p.add_argument('--chunk-size', type=int, default=1000, help='rows per worker task')
+    p.add_argument('--encoding', default='utf-8')
+    p.add_argument('--checkpoint', default=None, metavar='PATH',
+            help='checkpoint progress to PATH and resume from it if it exists')
+    p.add_argument('--checkpoint-every', type=int, default=100000,
+            help='rows between checkpoints')
+    p.add_argument('--manifest', default=None, metavar='PATH',
+            help='only parse rows that are new or changed since the last run with this manifest')
+    p.add_argument('--key', default=None,
+            help='row key column (name, or index with --no-header) for --manifest')
+    p.add_argument('--vocabulary', default=None, metavar='PACK',
+            help='vocabulary pack (JSON source or compiled, see compile-vocab)')
+    p.set_defaults(func=_cmd_parse)
+
+    p = sub.add_parser('stream', help='parse one address per line from files or stdin')
+    p.add_argument('inputs', nargs='*', help="input files (default: stdin)")
+    p.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    p.add_argument('--format', choices=STREAM_FORMATS, default='jsonl', help='output format')
+    p.add_argument('--ordinal', action='store_true', help='append st/nd/rd/th to street numbers')
+    p.add_argument('--direction', action='store_true', help='abbreviate directions, e.g. West -> W')
+    p.add_argument('--suffix', choices=('last', 'all'), default=None,
+            help='abbreviate street types in the last word or in all words')
+    p.add_argument('--batch-size', type=int, default=1000, help='records per output write')
+    p.add_argument('-q', '--quiet', action='store_true',
+            help='do not report throughput and latency on stderr')
+    p.add_argument('--encoding', default='utf-8')
+    p.add_argument('--vocabulary', default=None, metavar='PACK',
+            help='vocabulary pack (JSON source or compiled, see compile-vocab)')
+    p.set_defaults(func=_cmd_stream)
+
+    p = sub.add_parser('serve', help='run a local micro-batching parse server (HTTP or Unix socket)')
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=8040)
+    p.add_argument('--unix', default=None, help='serve JSON lines on this Unix socket path instead of HTTP')
+    p.add_argument('--max-batch-size', type=int, default=256)
+    p.add_argument('--max-delay-ms', type=float, default=2.0)
+    p.add_argument('--max-pending', type=int, default=10000,
+            help='reject requests while this many addresses are queued')
+    p.set_defaults(func=_cmd_serve)
+
+    p = sub.add_parser('compile-vocab', help='compile a JSON vocabulary pack for fast loading')
+    p.add_argument('source', help='JSON source pack (or a compiled pack to recompile)')
+    p.add_argument('output', help='compiled pack file')
+    p.set_defaults(func=_cmd_compile_vocab)
+    return argp
+
+
+def main(argv=None):
+    args = build_arg_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.dedupe
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Group records whose addresses normalize to the same canonical key.
+
+        with AddressDeduplicator(max_records_in_memory=1000000) as dedupe:
+            for record_id, addr_str in rows:
+                dedupe.add(record_id, addr_str)
+            for key, record_ids in dedupe.duplicates():
+                ...
+
+    Records are grouped with an in-memory hash index in one pass over the
+    input. When more than `max_records_in_memory` records are held, the index
+    is spilled to hash-partitioned files on disk; groups() then reads the
+    partitions back one at a time, so memory is bounded by the larger of
+    `max_records_in_memory` and one partition.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import zlib
+
+from .streetaddress import StreetAddressFormatter, StreetAddressParser
+
+
+def canonical_key(addr, formatter):
+    """Canonical dedupe key of a parse() result (dict or ParsedAddress):
+    house, street with ordinals, abbreviated directions and street types,
+    and suite number, upper-cased and without '.'/','. Returns None when
+    the address has neither a house number nor a street."""
+    house = addr['house']
+    street = addr['street_full']
+    if house is None and street is None:
+        return None
+
+    direction_map = formatter.abbrev_direction_map
+    words = []
+    if street is not None:
+        for word in formatter.format_street(street, suffix='all').split():
+            word = word.strip('.,')
+            #unlike abbrev_direction, also when not followed by a number
+            word = direction_map.get(word.lower(), word)
+            words.append(word.upper())
+
+    suite = addr['suite_num'] or ''
+    return u'%s|%s|%s' % ((house or '').upper(), ' '.join(words), suite.lstrip('#').upper())
+
+
+class AddressDeduplicator():
+    def __init__(self, parser=None, formatter=None, max_records_in_memory=1000000,
+                 partitions=64, spill_dir=None):
+        self.parser = parser or StreetAddressParser()
+        self.formatter = formatter or StreetAddressFormatter()
+        self.max_records_in_memory = max_records_in_memory
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.skipped = 0
+        self._index = {}
+        self._in_memory = 0
+        self._tmp_dir = None
+
+    def key(self, addr_str):
+        return canonical_key(self.parser.parse(addr_str, compact=True), self.formatter)
+
+    def add(self, record_id, addr_str):
+        #record_id must be JSON serializable if the index may spill to disk
+        key = self.key(addr_str)
+        if key is None:
+            self.skipped += 1
+            return None
+        ids = self._index.get(key)
+        if ids is None:
+            self._index[key] = [record_id]
+        else:
+            ids.append(record_id)
+        self._in_memory += 1
+        if self._in_memory >= self.max_records_in_memory:
+            self._spill()
+        return key
+
+    def add_many(self, records):
+        for record_id, addr_str in records:
+            self.add(record_id, addr_str)
+
+    def groups(self):
+        """Yield (key, [record ids]) for every key, ids in insertion order."""
+        if self._tmp_dir is None:
+            for key, ids in self._index.items():
+                yield key, ids
+            return
+
+        self._spill()
+        for path in self._partition_paths():
+            if not os.path.exists(path):
+                continue
+            index = {}
+            with io.open(path, encoding='utf-8') as f:
+                for line in f:
+                    key, record_id = json.loads(line)
+                    ids = index.get(key)
+                    if ids is None:
+                        index[key] = [record_id]
+                    else:
+                        ids.append(record_id)
+            for key, ids in index.items():
+                yield key, ids
+
+    def duplicates(self):
+        for key, ids in self.groups():
+            if len(ids) > 1:
+                yield key, ids
+
+    def close(self):
+        self._index = {}
+        self._in_memory = 0
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _partition_paths(self):
+        return [os.path.join(self._tmp_dir, 'part-%04d.jsonl' % i) for i in range(self.partitions)]
+
+    def _spill(self):
+        if self._tmp_dir is None:
+            self._tmp_dir = tempfile.mkdtemp(prefix='streetaddress-dedupe-', dir=self.spill_dir)
+        buffers = {}
+        for key, ids in self._index.items():
+            part = zlib.crc32(key.encode('utf-8')) % self.partitions
+            lines = buffers.setdefault(part, [])
+            for record_id in ids:
+                lines.append(json.dumps([key, record_id], ensure_ascii=False))
+        paths = self._partition_paths()
+        for part, lines in buffers.items():
+            with io.open(paths[part], 'a', encoding='utf-8') as f:
+                f.write(u'\n'.join(lines))
+                f.write(u'\n')
+        self._index = {}
+        self._in_memory = 0
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.fuzzy
+    ~~~~~~~~~~~~~~~~~~~
+
+    Fuzzy matching of misspelled street types and unit designators
+    ("Stret", "Avenu", "Blvrd", "Apartmnt").
+
+        parser = StreetAddressParser(fuzzy=True)
+        parser.parse('1515 West 22 Stret')['street_type']    #'Stret'
+
+    The matcher is a SymSpell-style deletion index: every vocabulary word is
+    stored under each string obtained by deleting up to `max_distance` of
+    its characters. A lookup generates the deletions of the query (len + 1
+    of them at distance 1), so its cost depends on the query length only,
+    not on the vocabulary size. Candidates are confirmed with an optimal
+    string alignment (Damerau-Levenshtein) distance.
+
+    The parser consults the matcher only for tokens that are not already
+    known, once per distinct token (the result is kept in its token cache),
+    so the exact-match path is unaffected. Fuzzy matches change the token's
+    class, not its spelling.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+
+def _deletes(word, max_distance):
+    #all strings obtained by deleting up to max_distance characters
+    res = set([word])
+    frontier = [word]
+    for _ in range(max_distance):
+        nxt = []
+        for w in frontier:
+            for i in range(len(w)):
+                d = w[:i] + w[i+1:]
+                if d not in res:
+                    res.add(d)
+                    nxt.append(d)
+        frontier = nxt
+    return res
+
+
+def osa_distance(a, b):
+    """Optimal string alignment distance: insertions, deletions,
+    substitutions and transpositions of adjacent characters."""
+    if a == b:
+        return 0
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i-1] == b[j-1] else 1
+            d = min(prev[j] + 1, cur[j-1] + 1, prev[j-1] + cost)
+            if i > 1 and j > 1 and a[i-1] == b[j-2] and a[i-2] == b[j-1]:
+                d = min(d, prev2[j-2] + 1)
+            cur[j] = d
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def _distance_upto_1(a, b):
+    #osa_distance(a, b) when it is at most 1, else 2; much cheaper
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if la > lb:
+        a, b, la, lb = b, a, lb, la
+    i = 0
+    while i < la and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        if a[i+1:] == b[i+1:]:
+            return 1
+        if i + 1 < la and a[i] == b[i+1] and a[i+1] == b[i] and a[i+2:] == b[i+2:]:
+            return 1
+        return 2
+    if lb - la == 1 and a[i:] == b[i+1:]:
+        return 1
+    return 2
+
+
+class FuzzyMatcher():
+    def __init__(self, words, max_distance=1, min_length=5):
+        #words: {lower case word: tag}. Queries shorter than min_length are
+        #not matched; short tokens are too often real words one edit away
+        #from a street type.
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.tags = dict(words)
+        index = {}
+        for word in self.tags:
+            for d in _deletes(word, max_distance):
+                index.setdefault(d, []).append(word)
+        self._index = index
+
+    def fingerprint(self):
+        #changes with the words, their tags and the matching limits
+        import hashlib, json
+        h = hashlib.sha1()
+        h.update(json.dumps([self.max_distance, self.min_length,
+                             sorted(self.tags.items())]).encode('utf-8'))
+        return h.hexdigest()
+
+    def lookup(self, word):
+        """(vocabulary word, tag) closest to lower case `word`, or None
+        when nothing is within max_distance or the closest candidates
+        disagree on the tag."""
+        if len(word) < self.min_length or not word.isalpha():
+            return None
+        index = self._index
+        max_distance = self.max_distance
+        candidates = set()
+        for d in _deletes(word, max_distance):
+            matches = index.get(d)
+            if matches is not None:
+                candidates.update(matches)
+        best = None
+        best_distance = max_distance + 1
+        ambiguous = False
+        tags = self.tags
+        distance = _distance_upto_1 if max_distance == 1 else osa_distance
+        for cand in sorted(candidates):
+            if abs(len(cand) - len(word)) > max_distance:
+                continue
+            dist = distance(word, cand)
+            if dist > max_distance:
+                #both sides had a character deleted at different places
+                continue
+            if dist < best_distance:
+                best, best_distance, ambiguous = cand, dist, False
+            elif dist == best_distance and tags[cand] != tags[best]:
+                #e.g. equally close to a street type and a unit designator
+                ambiguous = True
+        if best is None or ambiguous:
+            return None
+        return best, tags[best]
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.incremental
+    ~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Manifest of previous parse results for incremental re-runs.
+
+        with Manifest('addresses.manifest') as manifest:
+            for key, result, reused in manifest.parse_records(rows):
+                ...
+
+    The manifest is an SQLite file mapping each row key to a hash of the
+    row's address and the parse result stored for it. Rows whose key and
+    address hash match a stored entry reuse that result; only new or changed
+    rows are parsed and formatted. Rows missing from a run are dropped from
+    the manifest at the end of it.
+
+    The manifest records the parser fingerprint (PARSER_VERSION plus the
+    parser's and formatter's vocabulary packs, see parser_fingerprint());
+    when it differs from the running one, every stored result is discarded.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import hashlib
+import json
+import sqlite3
+from itertools import islice
+
+from .streetaddress import StreetAddressFormatter, StreetAddressParser, parser_fingerprint
+
+#keys per SELECT ... IN (...), below SQLite's default parameter limit
+_LOOKUP_BATCH = 500
+
+
+def address_hash(addr_str):
+    return hashlib.sha1((addr_str or u'').encode('utf-8')).hexdigest()
+
+
+class Manifest():
+    def __init__(self, path, parser=None, formatter=None, fingerprint=None):
+        self.path = path
+        self.parser = parser or StreetAddressParser()
+        self.formatter = formatter or StreetAddressFormatter()
+        self.fingerprint = fingerprint or parser_fingerprint(self.parser.vocabulary,
+                                                             self.formatter.vocabulary,
+                                                             fuzzy=self.parser.fuzzy)
+        #per-run counters
+        self.reused = 0
+        self.parsed = 0
+        self.removed = 0
+        #True when stored results were dropped for a fingerprint mismatch
+        self.invalidated = False
+
+        self._db = sqlite3.connect(path)
+        self._db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)')
+        self._db.execute('CREATE TABLE IF NOT EXISTS entries ('
+                         'key PRIMARY KEY, hash TEXT, result TEXT, run INTEGER)')
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'fingerprint'").fetchone()
+        if row is not None and row[0] != self.fingerprint:
+            self._db.execute('DELETE FROM entries')
+            self.invalidated = True
+        self._set_meta('fingerprint', self.fingerprint)
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'run'").fetchone()
+        self._run = int(row[0]) + 1 if row is not None else 1
+        self._db.commit()
+
+    def parse(self, addr_str):
+        #the stored result: parse() plus 'street_formatted'
+        #copied: a cached parser returns read-only dicts
+        addr = dict(self.parser.parse(addr_str or ''))
+        street = addr['street_full']
+        if street is not None:
+            street = self.formatter.format_street(street)
+        addr['street_formatted'] = street
+        return addr
+
+    def parse_records(self, records, batch_size=1000):
+        """Yield (key, result, reused) for each (key, addr_str) of `records`,
+        in order. Keys must be unique within a run and SQLite-storable
+        (str, int or float)."""
+        it = iter(records)
+        while True:
+            batch = list(islice(it, batch_size))
+            if not batch:
+                break
+            stored = self._lookup([key for key, addr_str in batch])
+            updates = []
+            touched = []
+            for key, addr_str in batch:
+                h = address_hash(addr_str)
+                entry = stored.get(key)
+                if entry is not None and entry[0] == h:
+                    touched.append((self._run, key))
+                    self.reused += 1
+                    yield key, json.loads(entry[1]), True
+                    continue
+                result = self.parse(addr_str)
+                updates.append((key, h, json.dumps(result, ensure_ascii=False), self._run))
+                self.parsed += 1
+                yield key, result, False
+            self._db.executemany('UPDATE entries SET run = ? WHERE key = ?', touched)
+            self._db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)', updates)
+        self.finish()
+
+    def finish(self):
+        #drop entries not seen in this run and commit it
+        cur = self._db.execute('DELETE FROM entries WHERE run < ?', (self._run,))
+        self.removed += max(cur.rowcount, 0)
+        self._set_meta('run', str(self._run))
+        self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _lookup(self, keys):
+        found = {}
+        for i in range(0, len(keys), _LOOKUP_BATCH):
+            part = keys[i:i + _LOOKUP_BATCH]
+            sql = 'SELECT key, hash, result FROM entries WHERE key IN (%s)' % ','.join('?' * len(part))
+            for key, h, result in self._db.execute(sql, part):
+                found[key] = (h, result)
+        return found
+
+    def _set_meta(self, name, value):
+        self._db.execute('INSERT OR REPLACE INTO meta VALUES (?, ?)', (name, value))
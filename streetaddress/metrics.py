@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.metrics
+    ~~~~~~~~~~~~~~~~~~~~~
+
+    Latency histogram and per-stage timing counters.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import math
+import threading
+import time
+
+perf_counter = getattr(time, 'perf_counter', time.time)
+
+
+class LatencyHistogram():
+    """Log-bucketed histogram of durations in seconds.
+
+    Memory does not grow with the number of samples; reported percentiles
+    are the upper bound of their bucket, i.e. accurate to `growth`.
+    """
+
+    def __init__(self, growth=1.05, min_value=1e-7):
+        self.growth = growth
+        self.min_value = min_value
+        self._log_growth = math.log(growth)
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds > self.min_value:
+            idx = int(math.log(seconds / self.min_value) / self._log_growth)
+        else:
+            idx = 0
+        buckets = self.buckets
+        buckets[idx] = buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        #q in [0, 100]
+        if self.count == 0:
+            return 0.0
+        rank = max(1, int(math.ceil(self.count * q / 100.0)))
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                return min(self.min_value * self.growth ** (idx + 1), self.max)
+        return self.max
+
+    def snapshot(self):
+        return {
+                'count' : self.count,
+                'mean' : self.total / self.count if self.count else 0.0,
+                'p50' : self.percentile(50),
+                'p90' : self.percentile(90),
+                'p99' : self.percentile(99),
+                'max' : self.max,
+                }
+
+
+class StageStats():
+    """Thread-safe cumulative time and call count per stage, plus named
+    counters. Used by the parser/formatter when created with instrument=True.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seconds = {}
+        self._calls = {}
+        self._counters = {}
+
+    def record(self, stages, counters=()):
+        #stages: iterable of (name, seconds); counters: iterable of names
+        with self._lock:
+            seconds = self._seconds
+            calls = self._calls
+            for name, sec in stages:
+                seconds[name] = seconds.get(name, 0.0) + sec
+                calls[name] = calls.get(name, 0) + 1
+            for name in counters:
+                self._counters[name] = self._counters.get(name, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._seconds.clear()
+            self._calls.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            stages = dict((name, {'calls': self._calls[name], 'seconds': sec})
+                          for name, sec in self._seconds.items())
+            return {'stages': stages, 'counters': dict(self._counters)}
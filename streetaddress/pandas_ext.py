@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.pandas_ext
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    pandas Series accessor (optional; needs pandas).
+
+        import streetaddress.pandas_ext
+
+        df = addresses.streetaddress.parse()          #one column per field
+        streets = df['street_full'].streetaddress.format_street()
+
+    The column is factorized first: the parser and the formatter only run
+    once per distinct value, and the results are broadcast back to every
+    row through the integer codes. Columns have object dtype, with None for
+    missing values like parse(); a missing input gives None in every field.
+
+    This module is not imported by the package itself, so pandas never
+    adds to `import streetaddress`.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import numpy as np
+import pandas as pd
+
+from .streetaddress import ADDRESS_FIELDS, StreetAddressFormatter, StreetAddressParser
+
+
+def _broadcast(values, codes):
+    #values of the uniques, taken per row; code -1 (missing) takes the
+    #trailing None
+    arr = np.empty(len(values) + 1, dtype=object)
+    arr[:len(values)] = values
+    arr[-1] = None
+    return arr.take(codes)
+
+
+def _as_str(value):
+    return value if isinstance(value, str) else str(value)
+
+
+@pd.api.extensions.register_series_accessor('streetaddress')
+class StreetAddressAccessor():
+    def __init__(self, series):
+        self._series = series
+
+    def _factorize(self):
+        codes, uniques = pd.factorize(self._series)
+        return codes, [_as_str(v) for v in uniques]
+
+    def parse(self, skip_house=False, parser=None, fields=ADDRESS_FIELDS):
+        """DataFrame of the parse() fields, indexed like the Series."""
+        parser = parser or StreetAddressParser()
+        codes, uniques = self._factorize()
+        columns = parser.parse_columns(uniques, skip_house)
+        return pd.DataFrame(dict((f, _broadcast(columns[f], codes)) for f in fields),
+                            index=self._series.index, columns=list(fields), dtype=object)
+
+    def format_street(self, ordinal=True, direction=True, suffix='last', formatter=None):
+        """Series of format_street() over a Series of streets."""
+        format_street = (formatter or StreetAddressFormatter()).format_street
+        codes, uniques = self._factorize()
+        values = [format_street(s, ordinal, direction, suffix) for s in uniques]
+        return pd.Series(_broadcast(values, codes), index=self._series.index,
+                         name=self._series.name, dtype=object)
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.reader
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Memory-mapped bulk input reader.
+
+        for offset, addr_str in iter_field('dump.csv', 'address', skip_header=True):
+            ...
+
+    The file is walked by newline offsets over an mmap, so nothing is read or
+    decoded up front; only the requested field of each record is copied out
+    and decoded, through an ASCII fast path when possible. Pages already
+    consumed are released (where the platform supports madvise), keeping
+    resident memory flat regardless of file size.
+
+    Records are lines: quoted CSV fields may contain delimiters but not
+    newlines.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import csv
+import mmap
+import os
+import stat
+
+from .streetaddress import StreetAddressParser
+
+#release consumed pages every this many bytes
+_RELEASE_EVERY = 64 * 1024 * 1024
+
+
+def iter_lines(path, start=0):
+    """Yield (byte offset, line) for each line of `path` from byte offset
+    `start`, without the trailing newline (and '\\r')."""
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode):
+            #pipes and devices can't be mapped (and report no size)
+            for item in _iter_lines_buffered(f, start):
+                yield item
+            return
+        size = st.st_size
+        if size <= start:
+            return
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            can_release = hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_DONTNEED')
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            find = mm.find
+            pos = start
+            released = start - start % mmap.PAGESIZE
+            while pos < size:
+                end = find(b'\n', pos)
+                if end < 0:
+                    end = size
+                line = mm[pos:end]
+                if line[-1:] == b'\r':
+                    line = line[:-1]
+                yield pos, line
+                pos = end + 1
+                if can_release and pos - released >= _RELEASE_EVERY:
+                    upto = pos - pos % mmap.PAGESIZE
+                    mm.madvise(mmap.MADV_DONTNEED, released, upto - released)
+                    released = upto
+        finally:
+            mm.close()
+
+
+def _iter_lines_buffered(f, start):
+    pos = 0
+    for line in f:
+        offset = pos
+        pos += len(line)
+        if offset < start:
+            continue
+        if line[-1:] == b'\n':
+            line = line[:-1]
+        if line[-1:] == b'\r':
+            line = line[:-1]
+        yield offset, line
+
+
+def decode_field(raw, encoding='utf-8', errors='strict'):
+    #ASCII fast path; bytes.isascii() needs Python 3.7
+    try:
+        if raw.isascii():
+            return raw.decode('ascii')
+    except AttributeError:
+        pass
+    return raw.decode(encoding, errors)
+
+
+def iter_field(path, field=None, delimiter=b',', encoding='utf-8', errors='strict',
+               skip_header=False, start=0):
+    """Yield (byte offset, text) of one field per record.
+
+    `field` is None for the whole line, a column index, or a column name
+    (looked up in the header, which implies skip_header). Records too short
+    to have the field yield ''. Lines containing a quote are split with the
+    csv module; all others with a plain bytes split.
+    """
+    if skip_header or (field is not None and not isinstance(field, int)):
+        with open(path, 'rb') as f:
+            header = f.readline()
+        if field is not None and not isinstance(field, int):
+            names = _split_quoted(decode_field(header.rstrip(b'\r\n'), encoding, errors),
+                                  delimiter, encoding)
+            if field not in names:
+                raise ValueError('column %r not found in header' % field)
+            field = names.index(field)
+        start = max(start, len(header))
+
+    for offset, line in iter_lines(path, start):
+        if field is None:
+            raw = line
+        elif b'"' in line:
+            row = _split_quoted(decode_field(line, encoding, errors), delimiter, encoding)
+            yield offset, row[field] if field < len(row) else u''
+            continue
+        else:
+            parts = line.split(delimiter, field + 1)
+            raw = parts[field] if field < len(parts) else b''
+        yield offset, decode_field(raw, encoding, errors)
+
+
+def _split_quoted(text, delimiter, encoding):
+    return next(csv.reader([text], delimiter=delimiter.decode(encoding)), [])
+
+
+def parse_file(path, parser=None, skip_house=False, compact=False, **field_options):
+    """Yield (byte offset, parse result) for every record of `path`; see
+    iter_field for the field options."""
+    parse = (parser or StreetAddressParser()).parse
+    for offset, addr_str in iter_field(path, **field_options):
+        yield offset, parse(addr_str, skip_house, compact)
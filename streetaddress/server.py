@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.server
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Local parse server (Python 3.5+, asyncio, no external services).
+
+        street-address serve --port 8040
+        street-address serve --unix /tmp/streetaddress.sock
+
+    HTTP:
+
+        POST /parse   {"address": "..."} or {"addresses": [...]}, optional
+                      "skip_house" and "format" (true, or format_street
+                      keyword arguments)
+        GET  /stats   latency histogram and batching counters
+        GET  /health
+
+    Unix socket: one JSON request per line, same body as POST /parse, one
+    JSON response per line.
+
+    Concurrent requests are coalesced into micro-batches: a batch is run as
+    soon as `max_batch_size` addresses are queued or `max_delay` seconds
+    after the first one arrived. At most `max_pending` addresses may wait;
+    a request that does not fit is rejected as a whole (HTTP 503) instead of
+    queueing without bound, and one with more than `max_pending` addresses
+    can never fit (HTTP 413).
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+import json
+import logging
+
+from .metrics import LatencyHistogram, perf_counter
+from .streetaddress import StreetAddressFormatter, StreetAddressParser
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class RequestTooLarge(Exception):
+    pass
+
+
+class MicroBatcher():
+    def __init__(self, process_batch, max_batch_size=256, max_delay=0.002, max_pending=10000):
+        #process_batch(list of items) -> list of results, run on the event loop
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.latency = LatencyHistogram()
+        self.batch_sizes = LatencyHistogram(growth=1.25, min_value=1)
+        self.rejected = 0
+        self._queue = []
+        self._wakeup = None
+        self._task = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, item):
+        res = await self.submit_many([item])
+        return res[0]
+
+    async def submit_many(self, items):
+        #all or nothing: nothing is queued unless every item fits
+        if len(items) > self.max_pending:
+            self.rejected += 1
+            raise RequestTooLarge('more than %d addresses in one request' % self.max_pending)
+        if len(self._queue) + len(items) > self.max_pending:
+            self.rejected += 1
+            raise Overloaded('too many pending requests')
+        loop = asyncio.get_event_loop()
+        t0 = perf_counter()
+        futs = [loop.create_future() for _ in items]
+        self._queue.extend((item, fut, t0) for item, fut in zip(items, futs))
+        self._wakeup.set()
+        return await asyncio.gather(*futs)
+
+    async def _run(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            await self._wakeup.wait()
+            if len(self._queue) < self.max_batch_size:
+                deadline = loop.time() + self.max_delay
+                while len(self._queue) < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+            batch = self._queue[:self.max_batch_size]
+            del self._queue[:self.max_batch_size]
+            if self._queue:
+                self._wakeup.set()
+            else:
+                self._wakeup.clear()
+            if not batch:
+                continue
+
+            self.batch_sizes.add(len(batch))
+            try:
+                results = self.process_batch([item for item, fut, t0 in batch])
+            except Exception as e:
+                logger.exception('batch failed')
+                for item, fut, t0 in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+
+            now = perf_counter()
+            for (item, fut, t0), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+                self.latency.add(now - t0)
+            #let the resolved requests run before building the next batch
+            await asyncio.sleep(0)
+
+    def stats(self):
+        return {
+                'latency' : self.latency.snapshot(),
+                'batch_size' : self.batch_sizes.snapshot(),
+                'pending' : len(self._queue),
+                'rejected' : self.rejected,
+                }
+
+
+class ParseService():
+    def __init__(self, parser=None, formatter=None, **batch_options):
+        self.parser = parser or StreetAddressParser()
+        self.formatter = formatter or StreetAddressFormatter()
+        self.batcher = MicroBatcher(self._process_batch, **batch_options)
+
+    def _process_batch(self, items):
+        parse = self.parser.parse
+        format_street = self.formatter.format_street
+        results = []
+        for addr_str, skip_house, format_options in items:
+            addr = parse(addr_str, skip_house)
+            if format_options is not None:
+                #parse() results may be read-only when the parser caches
+                addr = dict(addr)
+                street = addr['street_full']
+                if street is not None:
+                    street = format_street(street, **format_options)
+                addr['street_formatted'] = street
+            results.append(addr)
+        return results
+
+    async def handle(self, request):
+        """Parse one request body (dict); returns a JSON-able response."""
+        if not isinstance(request, dict):
+            raise ValueError('request must be a JSON object')
+        skip_house = bool(request.get('skip_house', False))
+        format_options = request.get('format')
+        if format_options is True:
+            format_options = {}
+        elif isinstance(format_options, dict):
+            #validated here so that one bad request cannot fail a whole batch
+            if not set(format_options) <= set(['ordinal', 'direction', 'suffix']):
+                raise ValueError('unknown format option')
+            if format_options.get('suffix', 'last') not in (None, 'last', 'all'):
+                raise ValueError("suffix must be null, 'last' or 'all'")
+        else:
+            format_options = None
+
+        if 'addresses' in request:
+            addrs = request['addresses']
+            if not isinstance(addrs, list):
+                raise ValueError('addresses must be a list')
+        elif 'address' in request:
+            addrs = [request['address']]
+        else:
+            raise ValueError('missing address')
+        for a in addrs:
+            if not isinstance(a, str):
+                raise ValueError('addresses must be strings')
+
+        results = await self.batcher.submit_many([(a, skip_house, format_options) for a in addrs])
+        if 'addresses' in request:
+            return {'results': results}
+        return results[0]
+
+    ####################################################################
+    # HTTP
+    ####################################################################
+
+    async def handle_http(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self._http_reply(writer, 400, {'error': 'bad request line'}, False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = b''
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._http_reply(writer, 400, {'error': 'bad content-length'}, False)
+                    break
+                if length:
+                    body = await reader.readexactly(length)
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+
+                status, payload = await self._route(method, path, body)
+                await self._http_reply(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        path = path.split('?', 1)[0]
+        if path == '/parse' and method == 'POST':
+            try:
+                return 200, await self.handle(json.loads(body.decode('utf-8')))
+            except Overloaded as e:
+                return 503, {'error': str(e)}
+            except RequestTooLarge as e:
+                return 413, {'error': str(e)}
+            except ValueError as e:
+                return 400, {'error': str(e)}
+        if path == '/stats' and method == 'GET':
+            return 200, self.batcher.stats()
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok'}
+        return 404, {'error': 'not found'}
+
+    async def _http_reply(self, writer, status, payload, keep_alive):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   503: 'Service Unavailable'}
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = 'HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n' % (
+            status, reasons.get(status, ''), len(body))
+        if not keep_alive:
+            head += 'Connection: close\r\n'
+        writer.write(head.encode('latin-1') + b'\r\n' + body)
+        await writer.drain()
+
+    ####################################################################
+    # Unix socket, JSON lines
+    ####################################################################
+
+    async def handle_jsonl(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    res = await self.handle(json.loads(line.decode('utf-8')))
+                except (Overloaded, RequestTooLarge, ValueError) as e:
+                    res = {'error': str(e)}
+                writer.write(json.dumps(res, ensure_ascii=False).encode('utf-8') + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8040, unix_path=None):
+    """Start the service's batcher and an HTTP (TCP) or JSON-lines (Unix
+    socket) server; returns the asyncio server."""
+    service.batcher.start()
+    if unix_path:
+        return await asyncio.start_unix_server(service.handle_jsonl, path=unix_path)
+    return await asyncio.start_server(service.handle_http, host, port)
+
+
+def serve(host='127.0.0.1', port=8040, unix_path=None, **batch_options):
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    service = ParseService(**batch_options)
+    server = loop.run_until_complete(start_server(service, host, port, unix_path))
+    logger.info('listening on %s', unix_path or '%s:%d' % (host, port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.run_until_complete(server.wait_closed())
+        loop.run_until_complete(service.batcher.stop())
+        loop.close()
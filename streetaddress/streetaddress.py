@@ -11,113 +11,748 @@
 
 import re
 import six
+from collections import deque, namedtuple
+from itertools import islice
+
+from .cache import LRUCache, ReadOnlyDict, CacheInfo
+from .metrics import StageStats, perf_counter
+from .vocab import Vocabulary
+
+try:
+    from types import MappingProxyType as _frozen_dict
+except ImportError: #python 2; shared tables must stay read-only there too
+    from .cache import ReadOnlyDict as _frozen_dict
+
+########################################################################
+# ParsedAddress
+########################################################################
+
+#bump whenever a code change alters parse or format_street output; together
+#with the vocabulary tables it makes up parser_fingerprint()
+PARSER_VERSION = 1
+
+ADDRESS_FIELDS = ('house', 'street_name', 'street_type', 'street_full',
+                  'suite_num', 'suite_type', 'other')
+
+#token classes used by the parser's state machine
+TOKEN_WORD = 0
+TOKEN_STREET_TYPE = 1
+TOKEN_SUITE_TYPE = 2
+TOKEN_HASH = 3 #'#12' style suite number
+
+#extra fields of parse_locality()
+LOCALITY_FIELDS = ('city', 'state', 'zip')
+
+#what parse_any() recognized; each kind has its own result shape
+ADDRESS_KINDS = ('street', 'po_box', 'rural_route', 'intersection')
+
+_FIELD_INDEX = dict((f, i) for i, f in enumerate(ADDRESS_FIELDS))
+_EMPTY_VALUES = (None,) * len(ADDRESS_FIELDS)
+
+
+class ParsedAddress(namedtuple('ParsedAddress', ADDRESS_FIELDS)):
+    """Compact, immutable parse result.
+
+    Fields are available as attributes (``addr.house``) and, like the dict
+    returned by :meth:`StreetAddressParser.parse`, by key (``addr['house']``).
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, six.string_types):
+            key = _FIELD_INDEX[key]
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        idx = _FIELD_INDEX.get(key)
+        return default if idx is None else tuple.__getitem__(self, idx)
+
+    def as_dict(self):
+        return _values_to_dict(self)
+
+
+_make_parsed_address = ParsedAddress._make
+
+
+def _assemble(house, scanned):
+    street_accum, street_type, suite_type, suite_num, other_accum, marks = scanned
+    street_name = ' ' . join(street_accum) if street_accum else None
+    other = ' ' . join(other_accum) if other_accum else None
+
+    if street_name and street_type:
+        street_full = street_name + ' ' + street_type
+    elif street_name:
+        street_full = street_name
+    elif street_type:
+        street_full = street_type
+    else:
+        street_full = None
+
+    return (house, street_name, street_type, street_full, suite_num, suite_type, other)
+
+
+def _values_to_dict(v):
+    return {
+            'house' : v[0],
+            'street_name' : v[1],
+            'street_type' : v[2],
+            'street_full' : v[3],
+            'suite_num' : v[4],
+            'suite_type' : v[5],
+            'other' : v[6],
+            }
 
 ########################################################################
 # StreetAddressParser
 ########################################################################
+#Thread safety: one StreetAddressParser or StreetAddressFormatter may be
+#shared by any number of threads, also on free-threaded builds. Calls keep
+#their state in locals and return new objects (cached results are
+#read-only). Besides the read-only vocabulary, the only state shared
+#between calls is
+# - the token class cache: a plain dict of immutable, deterministic
+#   entries, so racing writers store equal values and a racing clear()
+#   only costs re-classification;
+# - the optional result cache and stats, which take a lock.
 
 class StreetAddressParser():
-    def __init__(self):
-        abbrev_suffix_map = get_abbrev_suffix_dict()
-        self.street_type_set = set(abbrev_suffix_map.keys()) | set(abbrev_suffix_map.values())
-
-        self.text2num_dict = get_text2num_dict()
-        self.suite_type_set = set([
-            'suite', 'ste', 'apt','apartment', 
-            'room', 'rm', '#',
-            ])
-        self.rec_st_nd_rd_th = re.compile(r'^\d+(st|nd|rd|th)$', flags=re.I|re.U)
-        self.rec_house_number = re.compile(r'^\d\S*$', flags=re.I|re.U)
-
-    def parse(self, addr_str, skip_house=False):
+    def __init__(self, cache_size=None, instrument=False, token_cache_size=100000,
+                 vocabulary=None, fuzzy=None):
+        #vocabulary tables are shared by all instances using the same pack
+        self.vocabulary = vocabulary = vocabulary or DEFAULT_VOCABULARY
+        self.street_type_set = vocabulary.street_type_set
+        self.text2num_dict = vocabulary.text2num_map
+        self.suite_type_set = vocabulary.suite_type_set
+        self.rec_st_nd_rd_th = _rec_st_nd_rd_th
+        self.rec_house_number = _rec_house_number
+        #optional matching of misspelled street types and unit designators:
+        #True for the default fuzzy.FuzzyMatcher, or a FuzzyMatcher
+        if fuzzy is True:
+            fuzzy = make_fuzzy_matcher(vocabulary)
+        self.fuzzy = fuzzy or None
+        #raw token -> (cleaned word, token class), see _classify_token
+        self._token_classes = {}
+        self._token_cache_size = token_cache_size
+        #optional memoization of parse results, keyed on (stripped input, skip_house, compact)
+        self._cache = LRUCache(cache_size) if cache_size else None
+        #optional per-stage timings and branch counters, see stats()
+        self._stats = None
+        if instrument:
+            self._stats = StageStats()
+            #only instrumented instances take the timed path
+            self._parse_values = self._parse_values_instrumented
+
+    def parse(self, addr_str, skip_house=False, compact=False):
+        #compact=True returns a ParsedAddress instead of a dict
+        cache = self._cache
+        if cache is None:
+            values = self._parse_values(addr_str, skip_house)
+            return _make_parsed_address(values) if compact else _values_to_dict(values)
+
+        #cached results are shared between callers, hence read-only
         addr_str = addr_str.strip()
-        res = {
-                'house' : None,
-                'street_name' : None,
-                'street_type' : None,
-                'street_full' : None,
-                'suite_num' : None,
-                'suite_type' : None,
-                'other' : None,
-                }
+        key = (addr_str, skip_house, compact)
+        res = cache.get(key)
+        if res is None:
+            values = self._parse_values(addr_str, skip_house)
+            if compact:
+                res = _make_parsed_address(values)
+            else:
+                res = ReadOnlyDict(_values_to_dict(values))
+            cache.put(key, res)
+        return res
+
+    def cache_info(self):
+        if self._cache is None:
+            return CacheInfo(0, 0, 0, 0, 0)
+        return self._cache.info()
 
+    def cache_clear(self):
+        if self._cache is not None:
+            self._cache.clear()
+
+    def stats(self):
+        #snapshot of {'stages': {name: {'calls', 'seconds'}}, 'counters': {name: n}},
+        #or None when the parser was not created with instrument=True
+        if self._stats is None:
+            return None
+        return self._stats.snapshot()
+
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
+
+    def _parse_values(self, addr_str, skip_house):
+        #returns the parsed fields as a plain tuple, in ADDRESS_FIELDS order
         tokens = addr_str.split()
-        start_idx = 0
+        if len(tokens) == 0:
+            return _EMPTY_VALUES
+        house, start_idx, house_branch = self._detect_house(tokens, skip_house)
+        return _assemble(house, self._scan_tokens(tokens, start_idx))
 
+    def _parse_values_instrumented(self, addr_str, skip_house):
+        clock = perf_counter
+        t0 = clock()
+        tokens = addr_str.split()
+        t1 = clock()
         if len(tokens) == 0:
-            return res
+            self._stats.record((('split', t1 - t0),), ('empty',))
+            return _EMPTY_VALUES
+        house, start_idx, house_branch = self._detect_house(tokens, skip_house)
+        t2 = clock()
+        scanned = self._scan_tokens(tokens, start_idx)
+        t3 = clock()
+        values = _assemble(house, scanned)
+        t4 = clock()
+
+        #which branch produced each field
+        street_first, street_last, type_i, suite_type_i, suite_num_i, other_first, other_last, \
+                suite_num_hash = scanned[5]
+        counters = ['house.' + house_branch]
+        if start_idx == 2:
+            counters.append('house.fraction')
+        if type_i >= 0:
+            counters.append('street_type')
+        if suite_num_hash:
+            counters.append('suite.hash')
+        else:
+            if suite_type_i >= 0:
+                counters.append('suite.type')
+            if suite_num_i >= 0:
+                counters.append('suite.num')
+        if other_first >= 0:
+            counters.append('other')
+
+        self._stats.record((('split', t1 - t0), ('house', t2 - t1),
+                            ('tokens', t3 - t2), ('assemble', t4 - t3)), counters)
+        return values
 
+    def _detect_house(self, tokens, skip_house):
+        #returns (house, index of the first street token, branch taken)
         if skip_house:
-            start_idx = 0
+            return None, 0, 'skip'
+
+        text2num_dict = self.text2num_dict
+        first_lw = tokens[0].lower()
+        if first_lw in text2num_dict:
+            house = six.text_type(text2num_dict[first_lw])
+            branch = 'text2num'
+        elif self.rec_st_nd_rd_th.search(tokens[0]):
+            #first token is actually a street number (not house)
+            return None, 0, 'ordinal_first_token'
+        elif self.rec_house_number.search(tokens[0]):
+            house = tokens[0]
+            branch = 'number'
         else:
-            if tokens[0].lower() in self.text2num_dict:
-                res['house'] = six.text_type(self.text2num_dict[tokens[0].lower()])
-                start_idx = 1
-            elif self.rec_st_nd_rd_th.search(tokens[0]):
-                #first token is actually a street number (not house)
-                start_idx = 0 
-            elif self.rec_house_number.search(tokens[0]):
-                res['house'] = tokens[0] 
-                start_idx = 1
-            else:
-                #no house number
-                start_idx = 0
+            #no house number
+            return None, 0, 'none'
 
-            if res['house'] and len(tokens) >= 2 and tokens[1] == '1/2':
-                res['house'] += ' ' + tokens[1] 
-                start_idx = 2
+        if house and len(tokens) >= 2 and tokens[1] == '1/2':
+            return house + ' ' + tokens[1], 2, branch
+        return house, 1, branch
 
+    def _scan_tokens(self, tokens, start_idx, end_idx=None):
+        #The token state machine shared by parse() and parse_spans(), over
+        #tokens[start_idx:end_idx].
+        #Besides the field values it returns `marks`, the token indices that
+        #produced them: (street first, street last, street type, suite type,
+        #suite num, other first, other last), -1 when unset, and whether the
+        #suite number came from a '#12' token.
+        token_classes = self._token_classes
+        classify_token = self._classify_token
+
+        street_type = None
+        suite_num = None
+        suite_type = None
         street_accum = []
         other_accum = []
         is_in_state = 'street' #can be 'street', 'suite', 'other'
+        street_first = street_last = type_i = suite_type_i = suite_num_i = other_first = other_last = -1
+        suite_num_hash = False
 
-        for i in range(start_idx, len(tokens)):
-            word = tokens[i]
-            #word = re.sub(r'[\.\,]+$', '', word, flags=re.I|re.U) 
-            while len(word) > 0 and (word[-1] == '.' or word[-1] == ','):
-                #truncate the trailing dot (for abbrev)
-                word = word[:-1]
-            word_lw = word.lower()
+        for i in range(start_idx, len(tokens) if end_idx is None else end_idx):
+            token = tokens[i]
+            entry = token_classes.get(token)
+            if entry is None:
+                entry = classify_token(token)
+            word, token_class = entry
 
-            if word_lw in self.street_type_set and len(street_accum) > 0:
-                res['street_type'] = word
+            if token_class == TOKEN_STREET_TYPE and len(street_accum) > 0:
+                street_type = word
+                type_i = i
                 is_in_state = 'other'
-            elif word_lw in self.suite_type_set:
-                res['suite_type'] = word
+            elif token_class == TOKEN_SUITE_TYPE:
+                suite_type = word
+                suite_type_i = i
                 is_in_state = 'suite'
-            elif len(word_lw) > 0 and word_lw[0] == '#' and res['suite_num'] is not None:
-                res['suite_type'] = '#'
-                res['suite_num'] = word[1:]
+            elif token_class == TOKEN_HASH and suite_num is not None:
+                suite_type = '#'
+                suite_num = word[1:]
+                suite_type_i = suite_num_i = i
+                suite_num_hash = True
                 is_in_state = 'other'
             elif is_in_state == 'street':
                 street_accum.append(word)
+                if street_first < 0:
+                    street_first = i
+                street_last = i
             elif is_in_state == 'suite':
-                res['suite_num'] = word
+                suite_num = word
+                suite_num_i = i
+                suite_num_hash = False
                 is_in_state = 'other'
             elif is_in_state == 'other': 
                 other_accum.append(word)
+                if other_first < 0:
+                    other_first = i
+                other_last = i
             else:
                 raise Exception('this state should never be reached')
 
-        # TODO PO Box handling
-        #acronym = lambda s : Regex(r"\.?\s*".join(s)+r"\.?")
-        #poBoxRef = ((acronym("po") | acronym("apo") | acronym("afp")) + 
-        #            Optional(CaselessLiteral("BOX"))) + Word(alphanums)("boxnumber")
+        #PO Boxes, rural routes and intersections are routed around this
+        #state machine by parse_any()
+
+        marks = (street_first, street_last, type_i, suite_type_i, suite_num_i, other_first, other_last,
+                 suite_num_hash)
+        return street_accum, street_type, suite_type, suite_num, other_accum, marks
 
-        if street_accum:
-            res['street_name'] = ' ' . join(street_accum)
-        if other_accum:
-            res['other'] = ' ' . join(other_accum)
+    def _classify_token(self, token):
+        #Strip the trailing dots/commas (for abbrev) and classify the token
+        #once; the result is cached per raw token, the cache is emptied
+        #when it reaches token_cache_size.
+        word = token.rstrip('.,')
+        word_lw = word.lower()
+        if word_lw in self.street_type_set:
+            token_class = TOKEN_STREET_TYPE
+        elif word_lw in self.suite_type_set:
+            token_class = TOKEN_SUITE_TYPE
+        elif len(word_lw) > 0 and word_lw[0] == '#':
+            token_class = TOKEN_HASH
+        else:
+            token_class = TOKEN_WORD
+            if self.fuzzy is not None:
+                match = self.fuzzy.lookup(word_lw)
+                if match is not None:
+                    token_class = match[1]
+        entry = (word, token_class)
+
+        token_classes = self._token_classes
+        if len(token_classes) >= self._token_cache_size:
+            token_classes.clear()
+        if self._token_cache_size > 0:
+            token_classes[token] = entry
+        return entry
 
-        if res['street_name'] and res['street_type']:
-            res['street_full'] = res['street_name'] + ' ' + res['street_type']
-        elif res['street_name']:
-            res['street_full'] = res['street_name'] 
-        elif res['street_type']:
-            res['street_full'] = res['street_type'] 
+    def parse_spans(self, addr_str, skip_house=False, materialize=False):
+        #Like parse(), but every field is a (start, end) character span into
+        #addr_str, or None, so no field strings are built. A span runs from
+        #the first to the last token of the field (trailing '.' and ','
+        #excluded), so fields made of several tokens cover the original
+        #text between them; house 'One' spans the word, not '1'. With
+        #materialize=True each field is (start, end, addr_str[start:end]).
+        #Finding the token offsets costs more than joining the field
+        #strings, so this is for callers that need positions, not a faster
+        #parse() (see parse_spans in benchmarks/run_suite.py).
+        tokens = addr_str.split()
+        if len(tokens) == 0:
+            return dict.fromkeys(ADDRESS_FIELDS)
+        #token offsets, from a running find over the split tokens
+        find = addr_str.find
+        starts = []
+        pos = 0
+        for token in tokens:
+            pos = find(token, pos)
+            starts.append(pos)
+            pos += len(token)
 
+        house, start_idx = self._detect_house(tokens, skip_house)[:2]
+        street_accum, street_type, suite_type, suite_num, other_accum, marks = \
+                self._scan_tokens(tokens, start_idx)
+        street_first, street_last, type_i, suite_type_i, suite_num_i, other_first, other_last, \
+                suite_num_hash = marks
+
+        #the field values are the tokens minus trailing '.' and ',', so their
+        #lengths give the span ends
+        street_name = street_full = type_span = other = house_span = None
+        if street_first >= 0:
+            street_name = (starts[street_first], starts[street_last] + len(street_accum[-1]))
+        if street_type is not None:
+            type_span = (starts[type_i], starts[type_i] + len(street_type))
+        if other_first >= 0:
+            other = (starts[other_first], starts[other_last] + len(other_accum[-1]))
+        if house is not None:
+            house_span = (starts[0], starts[start_idx - 1] + len(tokens[start_idx - 1]))
+
+        #same truthiness rules as street_full in _parse_values
+        if len(street_accum) > 1 or (street_accum and street_accum[0]):
+            if street_type:
+                #a street type is only taken after a street word
+                street_full = (street_name[0], type_span[1])
+            else:
+                street_full = street_name
+        elif street_type:
+            street_full = type_span
+
+        #for '#12' the '#' is the type and the rest is the number
+        suite_type_span = suite_num_span = None
+        if suite_type == '#':
+            suite_type_span = (starts[suite_type_i], starts[suite_type_i] + 1)
+        elif suite_type is not None:
+            suite_type_span = (starts[suite_type_i], starts[suite_type_i] + len(suite_type))
+        if suite_num_hash:
+            suite_num_span = (starts[suite_num_i] + 1, starts[suite_num_i] + 1 + len(suite_num))
+        elif suite_num is not None:
+            suite_num_span = (starts[suite_num_i], starts[suite_num_i] + len(suite_num))
+
+        res = {
+                'house' : house_span,
+                'street_name' : street_name,
+                'street_type' : type_span,
+                'street_full' : street_full,
+                'suite_num' : suite_num_span,
+                'suite_type' : suite_type_span,
+                'other' : other,
+                }
+        if materialize:
+            for k, v in res.items():
+                if v is not None:
+                    res[k] = (v[0], v[1], addr_str[v[0]:v[1]])
+        return res
+
+    def parse_many(self, addrs, skip_house=False, chunk_size=1000, compact=False,
+                   executor=None, max_pending=None):
+        #lazily parse an iterable of address strings, pulling chunk_size
+        #items at a time from the source into one reused buffer; each chunk
+        #is parsed in one go by _parse_chunk. Results come out in input
+        #order. With a concurrent.futures executor (threads; the parser
+        #does not pickle), chunks are parsed on it, at most max_pending
+        #(default: 2 per CPU) at a time.
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        it = iter(addrs)
+        if executor is not None:
+            for res in self._parse_many_on(executor, it, skip_house, chunk_size, compact, max_pending):
+                yield res
+            return
+        parse_chunk = self._parse_chunk
+        chunk = []
+        while True:
+            chunk[:] = islice(it, chunk_size)
+            if not chunk:
+                break
+            for res in parse_chunk(chunk, skip_house, compact):
+                yield res
+
+    def _parse_chunk(self, chunk, skip_house, compact):
+        #parse() for a whole chunk: the cache, instrumentation and compact
+        #dispatch is resolved once per chunk instead of once per record
+        if self._cache is not None:
+            parse = self.parse
+            return [parse(addr_str, skip_house, compact) for addr_str in chunk]
+        parse_values = self._parse_values
+        make = _make_parsed_address if compact else _values_to_dict
+        return [make(parse_values(addr_str, skip_house)) for addr_str in chunk]
+
+    def _parse_many_on(self, executor, it, skip_house, chunk_size, compact, max_pending):
+        if not max_pending:
+            #os.cpu_count() is Python 3.4+; kept out of import time
+            import multiprocessing
+            max_pending = 2 * multiprocessing.cpu_count()
+        pending = deque()
+        try:
+            while True:
+                chunk = list(islice(it, chunk_size))
+                if chunk:
+                    pending.append(executor.submit(self._parse_chunk, chunk, skip_house, compact))
+                if pending and (not chunk or len(pending) >= max_pending):
+                    for res in pending.popleft().result():
+                        yield res
+                elif not chunk:
+                    break
+        finally:
+            #the consumer stopped early: do not leave work queued
+            for future in pending:
+                future.cancel()
+
+    def parse_columns(self, addrs, skip_house=False, chunk_size=1000, validity=False):
+        #parse an iterable straight into per-field column lists, e.g. for
+        #pandas.DataFrame(columns); missing values are None. With
+        #validity=True a 'valid' column marks the rows that have a street.
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be >= 1')
+        if self._cache is None:
+            parse_values = self._parse_values
+        else:
+            parse = self.parse
+            parse_values = lambda addr_str, skip_house: parse(addr_str, skip_house, True)
+
+        columns = [[] for f in ADDRESS_FIELDS]
+        it = iter(addrs)
+        while True:
+            chunk = list(islice(it, chunk_size))
+            if not chunk:
+                break
+            rows = [parse_values(addr_str, skip_house) for addr_str in chunk]
+            for col, values in zip(columns, zip(*rows)):
+                col.extend(values)
+
+        res = dict(zip(ADDRESS_FIELDS, columns))
+        if validity:
+            res['valid'] = [v is not None for v in res['street_full']]
         return res
 
+    ####################################################################
+    # PO Boxes, rural routes, intersections
+    ####################################################################
+
+    def parse_any(self, addr_str, skip_house=False):
+        #Route by shape, then parse. Returns a dict with a 'kind' key (see
+        #ADDRESS_KINDS) and
+        #   street        the parse() fields
+        #   po_box        'box', 'other'
+        #   rural_route   'route_type' ('RR' or 'HC'), 'route', 'box', 'other'
+        #   intersection  'street1', 'street2': parse() dicts without house
+        #"Box Elder Ln", "Post Rd" (only start like a PO Box or rural route)
+        #and "Lewis and Clark Trail" (no street type before the 'and') are
+        #parsed as streets.
+        tokens = addr_str.split()
+        kind = self._route(tokens)
+        res = None
+        if kind == 'po_box':
+            res = _parse_po_box(tokens)
+        elif kind == 'rural_route':
+            res = _parse_rural_route(tokens)
+        elif kind == 'intersection':
+            res = self._parse_intersection(tokens)
+        if res is None:
+            res = self.parse(addr_str, skip_house)
+            if self._cache is not None:
+                res = dict(res)
+            res['kind'] = 'street'
+        return res
+
+    def classify_address(self, addr_str):
+        #the kind parse_any() would try first, from the first token and a
+        #'&'/'and'/'@' following a street type
+        return self._route(addr_str.split())
+
+    def _route(self, tokens):
+        if not tokens:
+            return 'street'
+        first = _route_token(tokens[0])
+        if first in _PO_BOX_FIRST:
+            return 'po_box'
+        if first in _RURAL_ROUTE_FIRST:
+            return 'rural_route'
+        i = _connector_index(tokens)
+        if 0 < i < len(tokens) - 1:
+            #'100 Main St & Co' has a house number, so it is a street;
+            #'Rock and Roll Blvd' has no street type before the 'and'
+            t0 = tokens[0]
+            if (tokens[i-1].rstrip('.,').lower() in self.street_type_set
+                    and not (t0.lower() in self.text2num_dict
+                             or (self.rec_house_number.search(t0) and not self.rec_st_nd_rd_th.search(t0)))):
+                return 'intersection'
+        return 'street'
+
+    def _parse_intersection(self, tokens):
+        i = _connector_index(tokens)
+        street1 = self.parse(' '.join(tokens[:i]).rstrip(','), True)
+        if street1['street_type'] is None:
+            return None
+        return {
+                'kind' : 'intersection',
+                'street1' : street1,
+                'street2' : self.parse(' '.join(tokens[i+1:]), True),
+                }
+
+    ####################################################################
+    # City, state, ZIP
+    ####################################################################
+
+    def parse_locality(self, addr_str, skip_house=False):
+        #parse() plus LOCALITY_FIELDS:
+        #  366 West 52nd Street New York, NY 10019
+        #  -> city 'New York', state 'NY', zip '10019'
+        #The ZIP, state and city are found first, scanning back from the
+        #end, and the street is scanned only up to them, so city words
+        #such as 'Fort', 'Beach' or 'Park' are not taken for street types.
+        #The city runs back to the previous comma; without one it is what
+        #the street leaves in 'other'. 'other' never holds the locality.
+        #The state is returned as its two-letter abbreviation. Nothing is
+        #filled unless the address ends in a state and/or a 5 or 5+4 digit
+        #ZIP (see _find_state_zip), so "1 Main St Washington" has no state.
+        tokens = addr_str.split()
+        if not tokens:
+            res = _values_to_dict(_EMPTY_VALUES)
+            res['city'] = res['state'] = res['zip'] = None
+            return res
+
+        house, start_idx, house_branch = self._detect_house(tokens, skip_house)
+        loc_idx, state, zip_code = _find_state_zip(tokens, start_idx)
+        city = None
+        city_idx = _city_start(tokens, start_idx, loc_idx) if loc_idx < len(tokens) else -1
+        if city_idx >= 0 and self._classify_token(tokens[city_idx])[1] in (TOKEN_SUITE_TYPE, TOKEN_HASH):
+            #', Apt 5, NV 89502' is a suite, not a city
+            city_idx = -1
+        if city_idx >= 0:
+            values = _assemble(house, self._scan_tokens(tokens, start_idx, city_idx))
+            city = ' '.join(tokens[city_idx:loc_idx]).strip(' ,') or None
+        else:
+            scanned = self._scan_tokens(tokens, start_idx, loc_idx)
+            values = _assemble(house, scanned)
+            other_first, other_last = scanned[5][5], scanned[5][6]
+            if loc_idx < len(tokens) and other_first >= 0:
+                city = ' '.join(tokens[other_first:other_last + 1]).strip(' ,') or None
+                values = values[:6] + (None,)
+        res = _values_to_dict(values)
+        res['city'], res['state'], res['zip'] = city, state, zip_code
+        return res
+
+
+#normalized first tokens (see _route_token) that start a PO Box or a rural route
+_PO_BOX_FIRST = frozenset(['po', 'p', 'pob', 'pobox', 'box', 'post'])
+_RURAL_ROUTE_FIRST = frozenset(['rr', 'rural', 'rfd', 'hc'])
+_INTERSECTION_CONNECTORS = frozenset(['&', 'and', 'And', 'AND', '@'])
+
+
+def _route_token(token):
+    return token.replace('.', '').rstrip(',').lower()
+
+
+def _connector_index(tokens):
+    for i, token in enumerate(tokens):
+        if token in _INTERSECTION_CONNECTORS:
+            return i
+    return -1
+
+
+def _box_number(tokens, i):
+    #(box number, index after it), or (None, i) when tokens[i] is not one
+    if i < len(tokens):
+        num = tokens[i].rstrip(',').lstrip('#')
+        if num and any(c.isdigit() for c in num):
+            return num, i + 1
+    return None, i
+
+
+def _rest(tokens, i):
+    return ' '.join(tokens[i:]).lstrip(', ') or None
+
+
+def _parse_po_box(tokens):
+    #'PO Box 12', 'P.O. Box 12', 'P O Box 12', 'Post Office Box 12',
+    #'POB 12', 'Box 12', optionally followed by other text, e.g. the city
+    i = 0
+    n = len(tokens)
+    while i < n and _route_token(tokens[i]) in ('po', 'p', 'o', 'post', 'office'):
+        i += 1
+    if i == n or _route_token(tokens[i]) not in ('box', 'pob', 'pobox'):
+        return None
+    i += 1
+    box, i = _box_number(tokens, i)
+    if box is None:
+        return None
+    return {'kind' : 'po_box', 'box' : box, 'other' : _rest(tokens, i)}
+
+
+def _parse_rural_route(tokens):
+    #'RR 2 Box 152', 'Rural Route 2, Box 152', 'RFD 3', 'HC 68 Box 20'
+    first = _route_token(tokens[0])
+    i = 1
+    if first == 'rural':
+        if len(tokens) < 2 or _route_token(tokens[1]) != 'route':
+            return None
+        i = 2
+    route, i = _box_number(tokens, i)
+    if route is None:
+        return None
+    box = None
+    if i < len(tokens) and _route_token(tokens[i]) == 'box':
+        box, j = _box_number(tokens, i + 1)
+        if box is not None:
+            i = j
+    return {
+            'kind' : 'rural_route',
+            'route_type' : 'HC' if first == 'hc' else 'RR',
+            'route' : route,
+            'box' : box,
+            'other' : _rest(tokens, i),
+            }
+
+
+def _find_state_zip(tokens, first):
+    #(index of the first state/ZIP token, state, zip) at the end of
+    #tokens[first:], always leaving at least one token before them;
+    #(len(tokens), None, None) when there is neither
+    end = len(tokens)
+    zip_code = state = None
+    if end - 1 > first and _rec_zip.match(tokens[end - 1].rstrip(',.')):
+        zip_code = tokens[end - 1].rstrip(',.')
+        end -= 1
+
+    for n in (3, 2, 1):
+        if end - n <= first:
+            continue
+        name = ' '.join(t.rstrip(',.') for t in tokens[end - n:end])
+        abbr = _STATE_MAP.get(name.lower())
+        if abbr is None:
+            continue
+        #'in', 'or', 'me' etc. are words too: abbreviations must be upper
+        #case or followed by a ZIP
+        if n == 1 and len(name) == 2:
+            if not (name.isupper() or zip_code):
+                continue
+        #'Washington', 'New York' are cities too: full names must be
+        #followed by a ZIP or come after a comma
+        elif not (zip_code or tokens[end - n - 1].endswith(',')):
+            continue
+        state = abbr
+        end -= n
+        break
+
+    if state is None and zip_code is None:
+        return len(tokens), None, None
+    return end, state, zip_code
+
+
+def _city_start(tokens, first, end):
+    #index of the city before tokens[end], which runs back to the previous
+    #comma (its own last token may carry the comma before the state); -1
+    #when no comma separates it from the street
+    i = end - 1
+    while i > first and not tokens[i - 1].endswith(','):
+        i -= 1
+    return i if i > first else -1
+
+
+_rec_zip = re.compile(r'^\d{5}(?:-\d{4})?$')
+
+_STATE_NAMES = {
+    'AL' : 'Alabama', 'AK' : 'Alaska', 'AZ' : 'Arizona', 'AR' : 'Arkansas',
+    'CA' : 'California', 'CO' : 'Colorado', 'CT' : 'Connecticut', 'DE' : 'Delaware',
+    'DC' : 'District of Columbia', 'FL' : 'Florida', 'GA' : 'Georgia', 'HI' : 'Hawaii',
+    'ID' : 'Idaho', 'IL' : 'Illinois', 'IN' : 'Indiana', 'IA' : 'Iowa',
+    'KS' : 'Kansas', 'KY' : 'Kentucky', 'LA' : 'Louisiana', 'ME' : 'Maine',
+    'MD' : 'Maryland', 'MA' : 'Massachusetts', 'MI' : 'Michigan', 'MN' : 'Minnesota',
+    'MS' : 'Mississippi', 'MO' : 'Missouri', 'MT' : 'Montana', 'NE' : 'Nebraska',
+    'NV' : 'Nevada', 'NH' : 'New Hampshire', 'NJ' : 'New Jersey', 'NM' : 'New Mexico',
+    'NY' : 'New York', 'NC' : 'North Carolina', 'ND' : 'North Dakota', 'OH' : 'Ohio',
+    'OK' : 'Oklahoma', 'OR' : 'Oregon', 'PA' : 'Pennsylvania', 'RI' : 'Rhode Island',
+    'SC' : 'South Carolina', 'SD' : 'South Dakota', 'TN' : 'Tennessee', 'TX' : 'Texas',
+    'UT' : 'Utah', 'VT' : 'Vermont', 'VA' : 'Virginia', 'WA' : 'Washington',
+    'WV' : 'West Virginia', 'WI' : 'Wisconsin', 'WY' : 'Wyoming',
+    'AS' : 'American Samoa', 'GU' : 'Guam', 'MP' : 'Northern Mariana Islands',
+    'PR' : 'Puerto Rico', 'VI' : 'Virgin Islands',
+    'AA' : 'Armed Forces Americas', 'AE' : 'Armed Forces Europe', 'AP' : 'Armed Forces Pacific',
+    }
+
+#lower case state name or abbreviation -> abbreviation
+_STATE_MAP = dict((name.lower(), abbr) for abbr, name in _STATE_NAMES.items())
+_STATE_MAP.update((abbr.lower(), abbr) for abbr in _STATE_NAMES)
+_STATE_MAP = _frozen_dict(_STATE_MAP)
+
+
 def get_abbrev_suffix_dict():
     return {
             # 'avenue' : 'ave',
@@ -679,26 +1314,113 @@ def get_text2num_dict():
         } 
 
 
+########################################################################
+# Shared vocabulary tables
+########################################################################
+#Built once at import time. They are read-only so that every parser and
+#formatter instance can share them; get_abbrev_suffix_dict() and
+#get_text2num_dict() still return fresh, mutable copies. Other vocabularies
+#can be passed to the parser and the formatter, see vocab.py.
+
+DEFAULT_VOCABULARY = Vocabulary(
+    get_abbrev_suffix_dict(),
+    get_text2num_dict(),
+    ['suite', 'ste', 'apt','apartment',
+     'room', 'rm', '#',
+     ],
+    {'east' : 'E',
+     'west' : 'W',
+     'north' : 'N',
+     'south' : 'S',
+     },
+    name='default')
+
+_rec_st_nd_rd_th = re.compile(r'^\d+(st|nd|rd|th)$', flags=re.I|re.U)
+_rec_house_number = re.compile(r'^\d\S*$', flags=re.I|re.U)
+
+#what re.U's \d matches, for _match_TH; py2 byte strings have no isdecimal()
+#and only ASCII digits
+if six.PY2:
+    def _isdecimal(c):
+        return c.isdecimal() if isinstance(c, six.text_type) else c.isdigit()
+else:
+    _isdecimal = str.isdecimal
+
+
+def make_fuzzy_matcher(vocabulary=None, max_distance=1, min_length=5):
+    #fuzzy.FuzzyMatcher over a vocabulary's street types and unit designators
+    from .fuzzy import FuzzyMatcher
+    vocabulary = vocabulary or DEFAULT_VOCABULARY
+    words = dict((w, TOKEN_STREET_TYPE) for w in vocabulary.street_type_set if w)
+    for w in vocabulary.suite_type_set:
+        if w.isalpha():
+            words[w] = TOKEN_SUITE_TYPE
+    return FuzzyMatcher(words, max_distance, min_length)
+
+
+def parser_fingerprint(*vocabularies, **kwargs):
+    #changes whenever PARSER_VERSION, any of the vocabularies (default:
+    #the built-in one) or the fuzzy matcher does (fuzzy=, a
+    #fuzzy.FuzzyMatcher or None for none), so that stored parse results
+    #can be invalidated automatically
+    import hashlib #rarely needed, kept out of import time
+    fuzzy = kwargs.pop('fuzzy', None)
+    if kwargs:
+        raise TypeError('unexpected keyword arguments: %s' % ', '.join(sorted(kwargs)))
+    h = hashlib.sha1()
+    h.update(str(PARSER_VERSION).encode('ascii'))
+    for vocab in vocabularies or (DEFAULT_VOCABULARY,):
+        h.update(vocab.fingerprint().encode('ascii'))
+    if fuzzy is not None:
+        h.update(b'fuzzy')
+        h.update(fuzzy.fingerprint().encode('ascii'))
+    return h.hexdigest()
+
+
 ########################################################################
 # StreetAddressFormatter
 ########################################################################
 class StreetAddressFormatter():
-    def __init__(self):
+    def __init__(self, instrument=False, vocabulary=None):
+        #vocabulary tables are shared by all instances using the same pack
+        self.vocabulary = vocabulary = vocabulary or DEFAULT_VOCABULARY
+        self.abbrev_suffix_map = vocabulary.abbrev_suffix_title_map
+        self.street_type_set = vocabulary.street_type_set
         #abbreviate west, east, north, south?
-        self.abbrev_suffix_map = get_abbrev_suffix_dict()
-        self.street_type_set = set(self.abbrev_suffix_map.keys()) | set(self.abbrev_suffix_map.values())
-        self.abbrev_direction_map = {
-            'east' : 'E',
-            'west' : 'W', 
-            'north' : 'N',
-            'south' : 'S',
-            }
+        self.abbrev_direction_map = vocabulary.abbrev_direction_map
+
+        #optional per-method timings and 'changed' counters, see stats()
+        self._stats = None
+        if instrument:
+            self._stats = StageStats()
+            for name in ('append_TH_to_street', 'abbrev_direction',
+                         'abbrev_street_avenue_etc', 'format_street'):
+                setattr(self, name, self._timed(name, getattr(self, name)))
+
+    def _timed(self, name, func):
+        stats = self._stats
+        changed = (name + '.changed',)
+        def timed(addr, *args, **kwargs):
+            t0 = perf_counter()
+            res = func(addr, *args, **kwargs)
+            stats.record(((name, perf_counter() - t0),), changed if res != addr else ())
+            return res
+        return timed
+
+    def stats(self):
+        #same shape as StreetAddressParser.stats(); format_street's
+        #ordinal step is also counted under append_TH_to_street
+        if self._stats is None:
+            return None
+        return self._stats.snapshot()
 
-        for k,v in self.abbrev_suffix_map.items():
-            self.abbrev_suffix_map[k] = v.title()
+    def reset_stats(self):
+        if self._stats is not None:
+            self._stats.reset()
 
-        TH_or_str = '|' . join(self.street_type_set)
-        self.re_TH= re.compile(r'\b(\d+)\s+(%s)\.?$' % TH_or_str, flags=re.I|re.U)
+    @property
+    def re_TH(self):
+        return self.vocabulary.re_TH
 
     def st_nd_th_convert(self, num_str):
         if len(num_str) >= 2 and (num_str[-2:] =='11' or num_str[-2:] =='12'):
@@ -715,12 +1437,41 @@ class StreetAddressFormatter():
     def append_TH_to_street(self, addr):
         #street,avenue needs to be the last word
         addr = addr.strip()
-        match = self.re_TH.search(addr)
+        match = self._match_TH(addr)
         if match:
-            repl = '%s %s' % (self.st_nd_th_convert(match.group(1)), match.group(2))
-            addr = addr.replace(match.group(0), repl)
+            pos, num_str, street_type = match
+            repl = '%s %s' % (self.st_nd_th_convert(num_str), street_type)
+            matched = addr[pos:]
+            if addr.find(matched) == pos:
+                addr = addr[:pos] + repl
+            else:
+                #same text occurs earlier; keep the replace-all behaviour
+                addr = addr.replace(matched, repl)
         return addr
 
+    def _match_TH(self, addr):
+        #Same match as re_TH (r'\b(\d+)\s+(<street type>)\.?$'), found by
+        #looking at the last two tokens and doing a single set lookup.
+        #Returns (start of the number, number, street type) or None.
+        parts = addr.rsplit(None, 1)
+        if len(parts) != 2:
+            return None
+        head, last = parts
+        street_type = last[:-1] if last[-1] == '.' else last
+        if street_type.lower() not in self.street_type_set:
+            return None
+
+        end = len(head)
+        pos = end
+        while pos > 0 and _isdecimal(head[pos - 1]):
+            pos -= 1
+        if pos == end:
+            return None
+        if pos > 0 and (head[pos - 1].isalnum() or head[pos - 1] == '_'):
+            #no word boundary before the number
+            return None
+        return pos, head[pos:], street_type
+
     def abbrev_direction(self, addr):
         word_lst = addr.split()
         if len(word_lst) == 0:
@@ -745,10 +1496,50 @@ class StreetAddressFormatter():
             pos_lst = range(len(word_lst))
 
         for p in pos_lst:
-            word = re.sub(r'\.$', '', word_lst[p]).lower() #get rid of trailing period
+            word = word_lst[p]
+            if word[-1] == '.':
+                word = word[:-1] #get rid of trailing period
+            word = word.lower()
             if word in self.abbrev_suffix_map:
                 word_lst[p] = self.abbrev_suffix_map[word]
         addr = ' ' . join(word_lst)
         return addr
 
+    def format_street(self, street, ordinal=True, direction=True, suffix='last'):
+        #Same result as calling append_TH_to_street (ordinal), abbrev_direction
+        #(direction) and abbrev_street_avenue_etc in that order, with suffix
+        #'last' for the default abbrev_only_last_token=True, 'all' for
+        #abbrev_only_last_token=False, or None to skip it. The street is
+        #split and joined once instead of once per step.
+        if suffix not in (None, 'last', 'all'):
+            raise ValueError("suffix must be None, 'last' or 'all'")
+        if ordinal:
+            street = self.append_TH_to_street(street)
+        if not direction and suffix is None:
+            return street
+
+        word_lst = street.split()
+        if len(word_lst) == 0:
+            return street
+
+        direction_map = self.abbrev_direction_map
+        suffix_map = self.abbrev_suffix_map
+        abbrev_all = suffix == 'all'
+        last = len(word_lst) - 1
+
+        for i in range(last + 1):
+            word = word_lst[i]
+            if direction and i < last:
+                word_lw = word.lower()
+                #should have a digit after direction, e.g. "West 23rd"
+                if word_lw in direction_map and word_lst[i+1][0].isdigit():
+                    word = direction_map[word_lw]
+            if abbrev_all or (i == last and suffix is not None):
+                key = word[:-1] if word[-1] == '.' else word
+                key = key.lower()
+                if key in suffix_map:
+                    word = suffix_map[key]
+            word_lst[i] = word
+        return ' ' . join(word_lst)
+
 
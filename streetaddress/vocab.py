@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""
+    streetaddress.vocab
+    ~~~~~~~~~~~~~~~~~~~
+
+    Vocabulary packs: the street type, number word, unit designator and
+    direction tables used by the parser and the formatter.
+
+        vocab = load_vocabulary('regional.json')     #source pack
+        compile_vocabulary('regional.json', 'regional.vocab')
+        vocab = load_vocabulary('regional.vocab')    #compiled, fast to load
+        parser = StreetAddressParser(vocabulary=vocab)
+        formatter = StreetAddressFormatter(vocabulary=vocab)
+
+    A source pack is a JSON object with any of
+
+        "suffixes"    {"boulevard": "blvd", ...}  street type -> abbreviation
+        "text2num"    {"one": "1", ...}           house number words
+        "suite_types" ["suite", "apt", ...]       unit designators
+        "directions"  {"west": "W", ...}          direction -> abbreviation
+        "extends"     "default"                   add to the built-in tables
+
+    Compiled packs hold the derived tables as well, in marshal format, so
+    loading one is a single marshal.loads(). They are specific to the major
+    Python version that compiled them.
+
+    :copyright: (c) 2012 by PN.
+    :license: MIT, see LICENSE for more details.
+"""
+
+import io
+import marshal
+import re
+
+try:
+    from types import MappingProxyType as _frozen_dict
+except ImportError: #python 2; shared tables must stay read-only there too
+    from .cache import ReadOnlyDict as _frozen_dict
+
+#compiled pack header; bump the digit when the layout changes
+_MAGIC = b'SAVOCAB1'
+
+
+class Vocabulary():
+    """Read-only vocabulary tables, shared by any number of parsers and
+    formatters."""
+
+    def __init__(self, suffixes, text2num, suite_types, directions, name=None):
+        self.name = name
+        self.abbrev_suffix_map = _frozen_dict(dict((k.lower(), v.lower()) for k, v in suffixes.items()))
+        self.abbrev_suffix_title_map = _frozen_dict(
+                dict((k, v.title()) for k, v in self.abbrev_suffix_map.items()))
+        self.street_type_set = (frozenset(self.abbrev_suffix_map.keys())
+                                | frozenset(self.abbrev_suffix_map.values()))
+        self.text2num_map = _frozen_dict(dict((k.lower(), v) for k, v in text2num.items()))
+        self.suite_type_set = frozenset(s.lower() for s in suite_types)
+        self.abbrev_direction_map = _frozen_dict(dict((k.lower(), v) for k, v in directions.items()))
+        self._re_TH = None
+
+    @property
+    def re_TH(self):
+        #the street type alternation is large, so only compile it when needed
+        if self._re_TH is None:
+            TH_or_str = '|' . join(sorted(self.street_type_set, key=len, reverse=True))
+            self._re_TH = re.compile(r'\b(\d+)\s+(%s)\.?$' % TH_or_str, flags=re.I|re.U)
+        return self._re_TH
+
+    def extend(self, suffixes=None, text2num=None, suite_types=None, directions=None, name=None):
+        """New Vocabulary with these entries added to (or overriding) this one's."""
+        def merged(base, extra):
+            res = dict(base)
+            res.update(extra or {})
+            return res
+        return Vocabulary(merged(self.abbrev_suffix_map, suffixes),
+                          merged(self.text2num_map, text2num),
+                          self.suite_type_set | frozenset(suite_types or ()),
+                          merged(self.abbrev_direction_map, directions),
+                          name=name or self.name)
+
+    def fingerprint(self):
+        #rarely needed, kept out of import time
+        import hashlib, json
+        h = hashlib.sha1()
+        for part in (sorted(self.abbrev_suffix_map.items()),
+                     sorted(self.text2num_map.items()),
+                     sorted(self.suite_type_set),
+                     sorted(self.abbrev_direction_map.items())):
+            h.update(json.dumps(part).encode('utf-8'))
+        return h.hexdigest()
+
+    def to_source(self):
+        return {
+                'name' : self.name,
+                'suffixes' : dict(self.abbrev_suffix_map),
+                'text2num' : dict(self.text2num_map),
+                'suite_types' : sorted(self.suite_type_set),
+                'directions' : dict(self.abbrev_direction_map),
+                }
+
+    ####################################################################
+    # Compiled form
+    ####################################################################
+
+    def dumps(self):
+        return _MAGIC + marshal.dumps((
+            self.name,
+            dict(self.abbrev_suffix_map),
+            dict(self.abbrev_suffix_title_map),
+            self.street_type_set,
+            dict(self.text2num_map),
+            self.suite_type_set,
+            dict(self.abbrev_direction_map),
+            ))
+
+    @classmethod
+    def loads(cls, data):
+        if not data.startswith(_MAGIC):
+            raise ValueError('not a compiled vocabulary pack')
+        try:
+            fields = marshal.loads(data[len(_MAGIC):])
+        except (EOFError, ValueError, TypeError):
+            raise ValueError('corrupt vocabulary pack, or compiled by another Python version')
+        #the tables are stored fully derived, so skip __init__
+        self = cls.__new__(cls)
+        (self.name, suffix_map, title_map, self.street_type_set,
+         text2num_map, self.suite_type_set, direction_map) = fields
+        self.abbrev_suffix_map = _frozen_dict(suffix_map)
+        self.abbrev_suffix_title_map = _frozen_dict(title_map)
+        self.text2num_map = _frozen_dict(text2num_map)
+        self.abbrev_direction_map = _frozen_dict(direction_map)
+        self._re_TH = None
+        return self
+
+
+def vocabulary_from_source(source):
+    """Vocabulary from a source pack (dict, see the module docstring)."""
+    extends = source.get('extends')
+    if extends not in (None, 'default'):
+        raise ValueError("'extends' must be 'default'")
+    if extends == 'default':
+        #imported here: streetaddress builds the default pack from this module
+        from .streetaddress import DEFAULT_VOCABULARY
+        return DEFAULT_VOCABULARY.extend(source.get('suffixes'), source.get('text2num'),
+                                         source.get('suite_types'), source.get('directions'),
+                                         name=source.get('name'))
+    return Vocabulary(source.get('suffixes', {}), source.get('text2num', {}),
+                      source.get('suite_types', ()), source.get('directions', {}),
+                      name=source.get('name'))
+
+
+def load_vocabulary(path):
+    """Load a compiled pack, or a JSON source pack."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data.startswith(_MAGIC):
+        return Vocabulary.loads(data)
+    import json #only source packs need it, kept out of import time
+    return vocabulary_from_source(json.loads(data.decode('utf-8')))
+
+
+def compile_vocabulary(source_path, output_path):
+    """Compile a source pack (or recompile a compiled one) to `output_path`."""
+    vocab = load_vocabulary(source_path)
+    with io.open(output_path, 'wb') as f:
+        f.write(vocab.dumps())
+    return vocab
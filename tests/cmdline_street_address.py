@@ -3,7 +3,6 @@
 
 import logging
 import json
-import six
 import unittest
 from optparse import OptionParser
 from streetaddress import StreetAddressFormatter, StreetAddressParser
@@ -25,6 +24,9 @@ Examples:
     ./%prog --addr="135-20 40th ROAD, queens, NY 11354"
     ./%prog --addr="22-15 31st St, 11105"
 
+For bulk input use the installed command instead, e.g.
+    street-address stream --ordinal --direction --suffix last < addresses.txt
+
     """
     optp = OptionParser(usage=usage)
 
@@ -83,21 +85,21 @@ Examples:
     for t in lst:
         if t:
             print('"%s"' % t)
-            logging.info('addr_str: ' + six.text_type(t))
+            logging.info('addr_str: %s', t)
             addr = addr_parser.parse(t)
 
             if addr['street_full'] is not None:
                 street = addr_formatter.append_TH_to_street(addr['street_full'])
-                logging.info('After append_TH_to_street: ' + street)
+                logging.info('After append_TH_to_street: %s', street)
 
                 street = addr_formatter.abbrev_direction(street)
-                logging.info('After abbrev_direction: ' + street)
+                logging.info('After abbrev_direction: %s', street)
 
                 street = addr_formatter.abbrev_street_avenue_etc(street)
-                logging.info('After abbrev_street_avenue_etc: ' + street)
+                logging.info('After abbrev_street_avenue_etc: %s', street)
 
                 street = addr_formatter.abbrev_street_avenue_etc(street, abbrev_only_last_token=False)
-                logging.info('After abbrev_street_avenue_etc (aggressive): ' + street)
+                logging.info('After abbrev_street_avenue_etc (aggressive): %s', street)
 
             print(json.dumps(addr, sort_keys=True))
 
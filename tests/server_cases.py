@@ -0,0 +1,127 @@
+#TestServer, imported by test_server.py on Python 3.5+ only: async def is a
+#syntax error on older interpreters
+import asyncio
+import json
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressParser
+from streetaddress.server import MicroBatcher, Overloaded, ParseService, RequestTooLarge, start_server
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+class TestServer(unittest.TestCase):
+    def test_micro_batching_and_backpressure(self):
+        batches = []
+
+        def process(items):
+            batches.append(len(items))
+            return [i * 2 for i in items]
+
+        async def scenario():
+            batcher = MicroBatcher(process, max_batch_size=4, max_delay=0.01, max_pending=10)
+            batcher.start()
+            results = await asyncio.gather(*[batcher.submit(i) for i in range(10)])
+            overflow = await asyncio.gather(*[batcher.submit(i) for i in range(11)],
+                                            return_exceptions=True)
+            await batcher.stop()
+            return results, overflow, batcher.stats()
+
+        results, overflow, stats = run(scenario())
+        eq_(results, [i * 2 for i in range(10)])
+        eq_(batches[:3], [4, 4, 2])
+        eq_(sum(isinstance(r, Overloaded) for r in overflow), 1)
+        eq_(stats['rejected'], 1)
+        eq_(stats['latency']['count'], 20)
+
+    def test_submit_many_is_all_or_nothing(self):
+        processed = []
+
+        def process(items):
+            processed.extend(items)
+            return items
+
+        async def scenario():
+            batcher = MicroBatcher(process, max_batch_size=4, max_delay=0.01, max_pending=10)
+            batcher.start()
+            errors = []
+            try:
+                await batcher.submit_many(list(range(11)))
+            except RequestTooLarge as e:
+                errors.append(e)
+            pending = asyncio.ensure_future(batcher.submit_many(list(range(6))))
+            await asyncio.sleep(0)
+            try:
+                await batcher.submit_many(list(range(5)))
+            except Overloaded as e:
+                errors.append(e)
+            results = await pending
+            await batcher.stop()
+            return errors, results
+
+        errors, results = run(scenario())
+        eq_([type(e) for e in errors], [RequestTooLarge, Overloaded])
+        eq_(results, list(range(6)))
+        eq_(processed, list(range(6)))
+
+    def test_cached_parser(self):
+        async def scenario():
+            service = ParseService(parser=StreetAddressParser(cache_size=10), max_delay=0.001)
+            service.batcher.start()
+            try:
+                first = await service.handle({'address': 'West 23 Street', 'format': True})
+                second = await service.handle({'address': 'West 23 Street'})
+            finally:
+                await service.batcher.stop()
+            return first, second
+
+        first, second = run(scenario())
+        eq_(first['street_formatted'], 'W 23rd St')
+        ok_('street_formatted' not in second)
+
+    def test_http(self):
+        async def request(port, method, path, payload=None, length=None):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            body = json.dumps(payload).encode('utf-8') if payload is not None else b''
+            if length is None:
+                length = str(len(body))
+            writer.write(('%s %s HTTP/1.1\r\nContent-Length: %s\r\nConnection: close\r\n\r\n' % (
+                method, path, length)).encode('latin-1') + body)
+            data = await reader.read()
+            writer.close()
+            head, _, body = data.partition(b'\r\n\r\n')
+            return int(head.split()[1]), json.loads(body.decode('utf-8'))
+
+        async def scenario():
+            service = ParseService(max_delay=0.001)
+            server = await start_server(service, port=0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                one = await request(port, 'POST', '/parse', {'address': 'West 23 Street', 'format': True})
+                many = await request(port, 'POST', '/parse', {'addresses': ['10 Downing St', '']})
+                bad = await request(port, 'POST', '/parse', {'foo': 1})
+                large = await request(port, 'POST', '/parse', {'addresses': ['1 Main St'] * 10001})
+                bad_length = [(await request(port, 'POST', '/parse', {'address': '1 Main St'}, length))[0]
+                              for length in ('abc', '-1')]
+                stats = await request(port, 'GET', '/stats')
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.batcher.stop()
+            return one, many, bad, large, bad_length, stats
+
+        one, many, bad, large, bad_length, stats = run(scenario())
+        eq_(one[0], 200)
+        eq_(one[1]['street_formatted'], 'W 23rd St')
+        eq_([r['house'] for r in many[1]['results']], ['10', None])
+        eq_(bad[0], 400)
+        eq_(large[0], 413)
+        eq_(bad_length, [400, 400])
+        eq_(stats[1]['latency']['count'], 3)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressParser
+from streetaddress.autocomplete import StreetIndex
+
+ADDRESSES = [
+    '1515 West 22 Street',
+    '20 W. 22nd St., Apt 5',
+    '100 West 23 Street',
+    '7 Main Street',
+    '350 main st',
+    '12 Main Avenue',
+    '5 Maine Road',
+    'Union Square',
+    '',
+    ]
+
+
+class TestAutocomplete(unittest.TestCase):
+    def setUp(self):
+        parser = StreetAddressParser()
+        self.index = StreetIndex()
+        self.index.add_many(parser.parse(a) for a in ADDRESSES)
+
+    def test_complete(self):
+        index = self.index
+        eq_(len(index), 6)
+        eq_(index.complete('w 2'), ['W 22nd St', 'W 23rd St'])
+        eq_(index.complete('W  22'), ['W 22nd St'])
+        eq_(index.complete('main'), ['Main Ave', 'Main St', 'Maine Rd'])
+        eq_(index.complete('main', limit=1), ['Main Ave'])
+        eq_(index.complete('main '), ['Main Ave', 'Main St'])
+        eq_(index.complete('main ', field='street_name'), [])
+        eq_(index.complete('mai', field='street_name'), ['Main Ave', 'Main St', 'Maine Rd'])
+        eq_(index.complete('w 22', field='street_name'), ['W 22nd St'])
+        eq_(index.complete('west', field='street_name'), [])
+        eq_(index.complete('x'), [])
+        assert_raises(ValueError, index.complete, 'main', field='house')
+
+    def test_house_range(self):
+        index = self.index
+        eq_(index.house_range('W 22nd St'), (20, 1515))
+        eq_(index.house_range('Union Sq'), None)
+        eq_(index.complete('main', house_range=(100, 400)), ['Main St'])
+        eq_(index.complete('w', house_range=(1000, 2000)), ['W 22nd St'])
+        eq_(index.complete('union', house_range=(0, 10 ** 6)), [])
+
+        index.add(StreetAddressParser().parse('123456789012345678901234 Main St'))
+        eq_(index.house_range('Main St'), (7, 350))
+
+    def test_save_and_load(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        path = os.path.join(tmp, 'streets.idx')
+        self.index.save(path)
+        index = StreetIndex.load(path)
+        for prefix in ('', 'w', 'main', 'u'):
+            eq_(index.complete(prefix), self.index.complete(prefix))
+        eq_(index.house_range('w 22nd st'), (20, 1515))
+
+        index.add(StreetAddressParser().parse('9 Main Blvd'))
+        eq_(index.complete('main b'), ['Main Blvd'])
+
+        with open(path, 'wb') as f:
+            f.write(b'garbage')
+        assert_raises(ValueError, StreetIndex.load, path)
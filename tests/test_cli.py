@@ -0,0 +1,113 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from nose.tools import *
+from streetaddress import cli
+from streetaddress.cli import run_parse, run_parse_file, run_stream
+from streetaddress.metrics import LatencyHistogram
+
+
+class TestCli(unittest.TestCase):
+    def test_parse_csv_keeps_order(self):
+        lines = ['id,address'] + ['%d,%d West 23 Street' % (i, i + 1) for i in range(50)]
+        in_fp = io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+        out_fp = io.StringIO()
+        eq_(run_parse(in_fp, out_fp, 'csv', workers=2, chunk_size=7), 50)
+
+        rows = out_fp.getvalue().splitlines()
+        eq_(rows[0].split(',')[:3], ['id', 'address', 'house'])
+        eq_([r.split(',')[0] for r in rows[1:]], [str(i) for i in range(50)])
+        ok_(rows[1].endswith(',W 23rd St'))
+
+    def test_parse_jsonl(self):
+        in_fp = io.BytesIO(b'{"addr": "One Union Square, Apt 22-C"}\n\n{"addr": null}\n'
+                           b'{"addr": 12}\n{"addr": ["1 Main St"]}\n"1 Main St"\n[1]\n')
+        out_fp = io.StringIO()
+        run_parse(in_fp, out_fp, 'jsonl', column='addr', workers=1)
+
+        rows = [json.loads(l) for l in out_fp.getvalue().splitlines()]
+        eq_(len(rows), 6)
+        eq_(rows[0]['house'], '1')
+        eq_(rows[0]['suite_num'], '22-C')
+        eq_(rows[1]['street_full'], None)
+        eq_((rows[2]['addr'], rows[2]['house']), (12, '12'))
+        eq_(rows[3]['street_full'], None)
+        eq_([(r['row'], r['error'], r['street_full']) for r in rows[4:]],
+            [('1 Main St', 'not a JSON object', None), ([1], 'not a JSON object', None)])
+
+    def test_no_header_needs_column_index(self):
+        with assert_raises(SystemExit) as cm:
+            cli.main(['parse', '--no-header', '--format', 'csv', '-'])
+        ok_('--column' in str(cm.exception))
+
+    def test_stream_with_stats(self):
+        hist = LatencyHistogram()
+        out_fp = io.StringIO()
+        lines = ['West 23 Street\n', '\n', '1600 Pennsylvania Ave\n']
+        eq_(run_stream(lines, out_fp, out_format='csv', ordinal=True, direction=True,
+                       suffix='last', batch_size=1, histogram=hist), 2)
+        rows = out_fp.getvalue().splitlines()
+        eq_(rows[0].split(',')[-1], 'street_formatted')
+        eq_(rows[1].split(',')[-1], 'W 23rd St')
+        eq_(hist.count, 2)
+        ok_(0 < hist.percentile(50) <= hist.percentile(99) <= hist.max)
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'needs named pipes')
+    def test_stream_from_pipe(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        fifo = os.path.join(tmp, 'in.fifo')
+        out = os.path.join(tmp, 'out.jsonl')
+        os.mkfifo(fifo)
+        def feed():
+            with open(fifo, 'wb') as f:
+                f.write(b'West 23 Street\n1600 Pennsylvania Ave\n')
+        writer = threading.Thread(target=feed)
+        writer.start()
+        try:
+            eq_(cli.main(['stream', fifo, '-o', out, '--quiet']), 0)
+        finally:
+            writer.join()
+        with io.open(out, encoding='utf-8') as f:
+            eq_([json.loads(l)['house'] for l in f], [None, '1600'])
+
+    def test_parse_file_resumes_from_checkpoint(self):
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        src = os.path.join(tmp, 'in.csv')
+        with io.open(src, 'w', encoding='utf-8') as f:
+            f.write(u'id,address\n')
+            for i in range(50):
+                f.write(u'%d,"%d West 23 Street, Apt %d"\n' % (i, i + 1, i))
+        expected = os.path.join(tmp, 'expected.csv')
+        eq_(run_parse_file(src, expected, workers=1, chunk_size=5), 50)
+
+        #die on the 5th chunk: 15 rows are checkpointed, 20 written
+        out = os.path.join(tmp, 'out.csv')
+        ckpt = os.path.join(tmp, 'out.ckpt')
+        process_chunk = cli._process_chunk
+        calls = []
+        def failing(task):
+            calls.append(task)
+            if len(calls) == 5:
+                raise KeyboardInterrupt
+            return process_chunk(task)
+        cli._process_chunk = failing
+        try:
+            assert_raises(KeyboardInterrupt, run_parse_file, src, out, workers=1,
+                          chunk_size=5, checkpoint_path=ckpt, checkpoint_every=15)
+        finally:
+            cli._process_chunk = process_chunk
+        with open(ckpt) as f:
+            eq_(json.load(f)['rows'], 15)
+
+        eq_(run_parse_file(src, out, workers=2, chunk_size=5,
+                           checkpoint_path=ckpt, checkpoint_every=15), 50)
+        ok_(not os.path.exists(ckpt))
+        with open(out, 'rb') as f, open(expected, 'rb') as g:
+            eq_(f.read(), g.read())
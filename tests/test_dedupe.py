@@ -0,0 +1,35 @@
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressFormatter, StreetAddressParser
+from streetaddress.dedupe import AddressDeduplicator, canonical_key
+
+
+RECORDS = [
+    (1, '1515 West 22 Street'),
+    (2, '1515 W. 22nd St., Apt 5'),
+    (3, '1515 w 22nd st apt 5'),
+    (4, '1515 W 22nd Street'),
+    (5, 'One Union Square'),
+    (6, '1 Union Sq'),
+    (7, '   '),
+    (8, '10 Downing St'),
+    ]
+
+
+class TestDedupe(unittest.TestCase):
+    def test_canonical_key(self):
+        parser = StreetAddressParser()
+        formatter = StreetAddressFormatter()
+        eq_(canonical_key(parser.parse('1515 West 22 Street #5'), formatter), '1515|W 22ND ST|')
+        eq_(canonical_key(parser.parse('12 west main street, Suite 3'), formatter), '12|W MAIN ST|3')
+        eq_(canonical_key(parser.parse(''), formatter), None)
+
+    def test_groups_in_memory_and_spilled(self):
+        expected = [[1, 4], [2, 3], [5, 6]]
+        for max_records in (1000, 2):
+            with AddressDeduplicator(max_records_in_memory=max_records, partitions=3) as dedupe:
+                dedupe.add_many(RECORDS)
+                eq_(sorted(ids for key, ids in dedupe.duplicates()), expected)
+                eq_(sum(len(ids) for key, ids in dedupe.groups()), 7)
+                eq_(dedupe.skipped, 1)
@@ -0,0 +1,36 @@
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressParser
+from streetaddress.fuzzy import FuzzyMatcher, osa_distance
+
+
+class TestFuzzy(unittest.TestCase):
+    def test_osa_distance(self):
+        eq_(osa_distance('street', 'street'), 0)
+        eq_(osa_distance('stret', 'street'), 1)
+        eq_(osa_distance('avneue', 'avenue'), 1)
+        eq_(osa_distance('blvrd', 'blvd'), 1)
+        eq_(osa_distance('road', 'lane'), 4)
+
+    def test_matcher(self):
+        matcher = FuzzyMatcher({'street': 'type', 'avenue': 'type', 'suite': 'unit', 'suites': 'type'})
+        eq_(matcher.lookup('stret'), ('street', 'type'))
+        eq_(matcher.lookup('avneue'), ('avenue', 'type'))
+        eq_(matcher.lookup('suitse'), None) #as close to 'suite' as to 'suites'
+        eq_(matcher.lookup('stre'), None) #shorter than min_length
+        eq_(matcher.lookup('str3et'), None)
+        eq_(matcher.lookup('washington'), None)
+
+    def test_parser(self):
+        parser = StreetAddressParser(fuzzy=True)
+        addr = parser.parse('12 Main Avenu, Apartmnt 3')
+        eq_(addr['street_name'], 'Main')
+        eq_(addr['street_type'], 'Avenu')
+        eq_(addr['suite_type'], 'Apartmnt')
+        eq_(addr['suite_num'], '3')
+        eq_(parser.parse('5 Sunset Blvrd')['street_type'], 'Blvrd')
+        eq_(parser.parse('1515 West 22 Street')['street_type'], 'Street')
+        eq_(parser.parse('1515 Washington Street')['street_name'], 'Washington')
+
+        eq_(StreetAddressParser().parse('5 Sunset Blvrd')['street_name'], 'Sunset Blvrd')
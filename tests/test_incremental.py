@@ -0,0 +1,70 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressParser
+from streetaddress.cli import run_parse, run_parse_incremental
+from streetaddress.incremental import Manifest
+
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, 'manifest')
+
+    def run_records(self, records, **options):
+        with Manifest(self.path, **options) as manifest:
+            results = list(manifest.parse_records(records, batch_size=2))
+        return manifest, results
+
+    def test_only_new_and_changed_rows_are_parsed(self):
+        manifest, results = self.run_records([(1, '1 Main St'), (2, '2 Oak Ave'), (3, '3 Elm Rd')])
+        eq_((manifest.reused, manifest.parsed), (0, 3))
+
+        manifest, results = self.run_records([(1, '1 Main St'), (2, '22 Oak Ave'), (4, '4 Pine Ln')])
+        eq_((manifest.reused, manifest.parsed, manifest.removed), (1, 2, 1))
+        eq_([(k, r['house'], reused) for k, r, reused in results],
+            [(1, '1', True), (2, '22', False), (4, '4', False)])
+        eq_(results[0][1]['street_formatted'], 'Main St')
+
+        manifest, results = self.run_records([(1, '1 Main St'), (4, '4 Pine Ln')])
+        eq_((manifest.reused, manifest.parsed, manifest.removed), (2, 0, 1))
+
+    def test_fingerprint_change_invalidates(self):
+        self.run_records([(1, '1 Main St')])
+        manifest, results = self.run_records([(1, '1 Main St')], fingerprint='other')
+        ok_(manifest.invalidated)
+        eq_((manifest.reused, manifest.parsed), (0, 1))
+
+    def test_fuzzy_setting_invalidates(self):
+        self.run_records([(1, '5 Sunset Blvrd')])
+        manifest, results = self.run_records([(1, '5 Sunset Blvrd')], parser=StreetAddressParser(fuzzy=True))
+        ok_(manifest.invalidated)
+        eq_(results[0][1]['street_type'], 'Blvrd')
+
+        from streetaddress.streetaddress import make_fuzzy_matcher
+        manifest, results = self.run_records([(1, '5 Sunset Blvrd')],
+                                             parser=StreetAddressParser(fuzzy=make_fuzzy_matcher(min_length=6)))
+        ok_(manifest.invalidated)
+
+    def test_cached_parser(self):
+        parser = StreetAddressParser(cache_size=10)
+        manifest, results = self.run_records([(1, '1 Main St'), (2, '1 Main St')], parser=parser)
+        eq_([r['street_formatted'] for k, r, reused in results], ['Main St', 'Main St'])
+        ok_('street_formatted' not in parser.parse('1 Main St'))
+
+    def test_cli_output_matches_full_run(self):
+        data = u'id,address\n' + u''.join(u'%d,"%d West 23 Street, Apt %d"\n' % (i, i, i) for i in range(20))
+        full = io.StringIO()
+        run_parse(io.BytesIO(data.encode('utf-8')), full, 'csv', workers=1)
+        for expected_reused in (0, 20):
+            out = io.StringIO()
+            with Manifest(self.path) as manifest:
+                eq_(run_parse_incremental(io.BytesIO(data.encode('utf-8')), out, manifest,
+                                          'csv', 'id', chunk_size=3), 20)
+            eq_(manifest.reused, expected_reused)
+            eq_(out.getvalue(), full.getvalue())
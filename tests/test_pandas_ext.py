@@ -0,0 +1,43 @@
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressFormatter, StreetAddressParser
+from streetaddress.streetaddress import ADDRESS_FIELDS
+
+try:
+    import pandas as pd
+    import streetaddress.pandas_ext
+except ImportError:
+    pd = None
+
+
+@unittest.skipIf(pd is None, 'pandas is not installed')
+class TestPandasExt(unittest.TestCase):
+    def test_parse(self):
+        addrs = ['1600 Pennsylvania Ave', None, 'One Union Square, Apt 22-C', '1600 Pennsylvania Ave']
+        series = pd.Series(addrs, index=[10, 11, 12, 13], name='address')
+        df = series.streetaddress.parse()
+        eq_(list(df.columns), list(ADDRESS_FIELDS))
+        eq_(list(df.index), [10, 11, 12, 13])
+
+        parser = StreetAddressParser()
+        for i, addr in zip(df.index, addrs):
+            row = df.loc[i].to_dict()
+            if addr is None:
+                ok_(all(v is None for v in row.values()))
+            else:
+                eq_(row, parser.parse(addr))
+
+        df = series.streetaddress.parse(fields=('house', 'street_type'))
+        eq_(df['street_type'].tolist(), ['Ave', None, 'Square', 'Ave'])
+
+    def test_format_street(self):
+        series = pd.Series(['West 23 Street', 'West 23 Street', None, 'North Main Avenue'])
+        res = series.streetaddress.format_street()
+        eq_(res.tolist(), ['W 23rd St', 'W 23rd St', None, 'North Main Ave'])
+        eq_(series.streetaddress.format_street(suffix=None)[0], 'W 23rd Street')
+
+    def test_parse_counts_distinct_values(self):
+        parser = StreetAddressParser(instrument=True)
+        pd.Series(['10 Downing St', '10 Downing St', '5 Main St'] * 100).streetaddress.parse(parser=parser)
+        eq_(parser.stats()['stages']['split']['calls'], 2)
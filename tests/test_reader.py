@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from nose.tools import *
+from streetaddress.reader import iter_field, iter_lines, parse_file
+
+
+class TestReader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, 'in.csv')
+        with io.open(self.path, 'w', encoding='utf-8', newline='') as f:
+            f.write(u'id,address\r\n1,221B Baker Street\r\n2,"10 Downing St, Apt 1"\n3,Calle Ñandú 5\n4')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_iter_lines_offsets(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for offset, line in iter_lines(self.path):
+            ok_(data[offset:].startswith(line))
+        eq_([line for offset, line in iter_lines(self.path, 12)][0], b'1,221B Baker Street')
+
+    @unittest.skipUnless(hasattr(os, 'mkfifo'), 'needs named pipes')
+    def test_iter_lines_pipe(self):
+        fifo = os.path.join(self.tmp_dir, 'in.fifo')
+        os.mkfifo(fifo)
+        def feed():
+            with open(fifo, 'wb') as f:
+                f.write(b'a,1\r\nb,2\nc,3')
+        writer = threading.Thread(target=feed)
+        writer.start()
+        try:
+            eq_(list(iter_lines(fifo, 1)), [(5, b'b,2'), (9, b'c,3')])
+        finally:
+            writer.join()
+
+    def test_iter_field(self):
+        eq_([text for offset, text in iter_field(self.path, 'address')],
+            [u'221B Baker Street', u'10 Downing St, Apt 1', u'Calle Ñandú 5', u''])
+        eq_([text for offset, text in iter_field(self.path, 0, skip_header=True)], [u'1', u'2', u'3', u'4'])
+        assert_raises(ValueError, list, iter_field(self.path, 'street'))
+
+    def test_parse_file(self):
+        res = [addr for offset, addr in parse_file(self.path, field='address', compact=True)]
+        eq_(res[1].suite_num, '1')
+        eq_(res[0].street_full, 'Baker Street')
@@ -0,0 +1,7 @@
+import sys
+import unittest
+
+if sys.version_info < (3, 5):
+    raise unittest.SkipTest('the server needs Python 3.5+')
+
+from server_cases import TestServer
@@ -1,7 +1,8 @@
 import unittest
 
 from nose.tools import *
-from streetaddress import StreetAddressFormatter, StreetAddressParser
+from streetaddress import StreetAddressFormatter, StreetAddressParser, ParsedAddress
+from streetaddress.streetaddress import TOKEN_STREET_TYPE, TOKEN_HASH
 
 class TestStreetAddress(unittest.TestCase):
     def setUp(self):
@@ -13,3 +14,218 @@ class TestStreetAddress(unittest.TestCase):
         addr = self.addr_parser.parse('221B Baker Street')
         eq_(self.addr_formatter.abbrev_street_avenue_etc(addr['street_full']), 'Baker St')
 
+
+
+    def test_parse_many_matches_parse(self):
+        addrs = ['221B Baker Street', 'One Union Square, Apt 22-C', '', '33 1/2 W 42nd St.']
+        res = list(self.addr_parser.parse_many(iter(addrs), chunk_size=3))
+        eq_(res, [self.addr_parser.parse(a) for a in addrs])
+        eq_(list(self.addr_parser.parse_many(addrs, chunk_size=3, compact=True)),
+            [self.addr_parser.parse(a, compact=True) for a in addrs])
+        for parser in (StreetAddressParser(cache_size=2), StreetAddressParser(instrument=True)):
+            eq_(list(parser.parse_many(addrs, True, chunk_size=3)), [parser.parse(a, True) for a in addrs])
+
+    def test_vocabulary_tables_are_shared_and_read_only(self):
+        ok_(StreetAddressParser().street_type_set is self.addr_parser.street_type_set)
+        ok_(StreetAddressFormatter().abbrev_suffix_map is self.addr_formatter.abbrev_suffix_map)
+        with assert_raises(TypeError):
+            self.addr_formatter.abbrev_suffix_map['street'] = 'X'
+        eq_(self.addr_formatter.append_TH_to_street('West 23 Street'), 'West 23rd Street')
+
+    def test_parse_cache(self):
+        parser = StreetAddressParser(cache_size=2)
+        first = parser.parse('221B Baker Street')
+        ok_(parser.parse('  221B Baker Street ') is first)
+        eq_(first, self.addr_parser.parse('221B Baker Street'))
+        with assert_raises(TypeError):
+            first['house'] = '1'
+        with assert_raises(TypeError):
+            first |= {'house': '1'}
+        eq_(parser.parse('221B Baker Street')['house'], '221B')
+
+        parser.parse('10 Downing St')
+        parser.parse('1600 Pennsylvania Ave')
+        info = parser.cache_info()
+        eq_((info.hits, info.misses, info.evictions, info.currsize), (2, 3, 1, 2))
+
+    def test_parse_compact(self):
+        addr = self.addr_parser.parse('One Union Square, Apt 22-C', compact=True)
+        ok_(isinstance(addr, ParsedAddress))
+        eq_(addr.house, '1')
+        eq_(addr['suite_num'], '22-C')
+        eq_(addr[1], 'Union')
+        eq_(addr.as_dict(), self.addr_parser.parse('One Union Square, Apt 22-C'))
+        eq_(self.addr_parser.parse('', compact=True).as_dict()['street_full'], None)
+
+    def test_parse_columns(self):
+        addrs = ['221B Baker Street', '', 'One Union Square, Apt 22-C']
+        cols = self.addr_parser.parse_columns(iter(addrs), chunk_size=2, validity=True)
+        eq_(cols['house'], ['221B', None, '1'])
+        eq_(cols['suite_num'], [None, None, '22-C'])
+        eq_(cols['valid'], [True, False, True])
+        cached = StreetAddressParser(cache_size=10).parse_columns(addrs)
+        eq_(cached['street_full'], cols['street_full'])
+
+    def test_append_TH_to_street(self):
+        th = self.addr_formatter.append_TH_to_street
+        eq_(th(' West 23  Street. '), 'West 23rd Street')
+        eq_(th('East 111 st'), 'East 111th st')
+        eq_(th('12-1/2 Ave'), '12-1/2nd Ave')
+        eq_(th('W23 St'), 'W23 St')
+        eq_(th('23 Foo'), '23 Foo')
+        eq_(th('5 St 5 St'), '5th St 5th St')
+
+    def test_format_street(self):
+        fmt = self.addr_formatter
+        for street in ['West 23 Street', 'north 5 avenue', 'Avenue of America', '  ']:
+            chained = fmt.abbrev_street_avenue_etc(fmt.abbrev_direction(fmt.append_TH_to_street(street)))
+            eq_(fmt.format_street(street), chained)
+        eq_(fmt.format_street('West 23 Street'), 'W 23rd St')
+        eq_(fmt.format_street('West Avenue Street', suffix='all'), 'West Ave St')
+        eq_(fmt.format_street('West 23 Street', ordinal=False, suffix=None), 'W 23 Street')
+
+    def test_parse_spans(self):
+        addr_str = ' 33 1/2 W. 42nd St., Apt 5 #6 Foo'
+        spans = self.addr_parser.parse_spans(addr_str)
+        text = dict((k, addr_str[v[0]:v[1]]) for k, v in spans.items() if v is not None)
+        eq_(text, {
+            'house': '33 1/2',
+            'street_name': 'W. 42nd',
+            'street_type': 'St',
+            'street_full': 'W. 42nd St',
+            'suite_type': '#',
+            'suite_num': '6',
+            'other': 'Foo',
+            })
+        mat = self.addr_parser.parse_spans('One Union Square', materialize=True)
+        eq_(mat['house'], (0, 3, 'One'))
+        eq_(mat['suite_num'], None)
+        eq_(self.addr_parser.parse_spans('   ')['street_full'], None)
+
+    def test_instrumentation(self):
+        eq_(self.addr_parser.stats(), None)
+        parser = StreetAddressParser(instrument=True)
+        for addr in ['One Union Square, Apt 22-C', '33 1/2 W 42nd St.', '19th St', '']:
+            eq_(parser.parse(addr), self.addr_parser.parse(addr))
+        stats = parser.stats()
+        eq_(stats['stages']['split']['calls'], 4)
+        eq_(stats['stages']['tokens']['calls'], 3)
+        eq_(stats['counters']['house.text2num'], 1)
+        eq_(stats['counters']['house.fraction'], 1)
+        eq_(stats['counters']['house.ordinal_first_token'], 1)
+        eq_(stats['counters']['suite.type'], 1)
+        eq_(stats['counters']['empty'], 1)
+        parser.reset_stats()
+        eq_(parser.stats()['counters'], {})
+
+        formatter = StreetAddressFormatter(instrument=True)
+        eq_(formatter.format_street('West 23 Street'), 'W 23rd St')
+        eq_(formatter.abbrev_direction('Main'), 'Main')
+        stats = formatter.stats()
+        eq_(stats['stages']['format_street']['calls'], 1)
+        eq_(stats['counters'], {'format_street.changed': 1, 'append_TH_to_street.changed': 1})
+
+    def test_token_class_cache_is_bounded(self):
+        parser = StreetAddressParser(token_cache_size=3)
+        eq_(parser.parse('1600 Pennsylvania Ave., Apt 5'), self.addr_parser.parse('1600 Pennsylvania Ave., Apt 5'))
+        ok_(len(parser._token_classes) <= 3)
+        eq_(parser._classify_token('Ave.,'), ('Ave', TOKEN_STREET_TYPE))
+        eq_(parser._classify_token('#12'), ('#12', TOKEN_HASH))
+        eq_(StreetAddressParser(token_cache_size=0).parse('10 Downing St')['street_type'], 'St')
+
+    def test_parse_locality(self):
+        parser = self.addr_parser
+        addr = '366 West 52nd Street New York, NY 10019'
+        res = parser.parse_locality(addr)
+        eq_((res['city'], res['state'], res['zip']), ('New York', 'NY', '10019'))
+        eq_(dict((k, res[k]) for k in parser.parse(addr) if k != 'other'),
+            dict((k, v) for k, v in parser.parse(addr).items() if k != 'other'))
+        eq_(res['other'], None)
+
+        def locality(addr):
+            res = parser.parse_locality(addr)
+            return res['city'], res['state'], res['zip']
+        eq_(locality('100 Main St, Apt 5, Reno, NV 89502-1234'), ('Reno', 'NV', '89502-1234'))
+        eq_(locality('1 Main St Springfield, Illinois'), ('Springfield', 'IL', None))
+        eq_(locality('1 Main St, Portland, or 97201'), ('Portland', 'OR', '97201'))
+        eq_(locality('1 Main St Portland or'), (None, None, None))
+        eq_(locality('1 Main St Washington'), (None, None, None))
+        eq_(locality('1 Main St New York'), (None, None, None))
+        eq_(locality('1 Main St Washington 98101'), (None, 'WA', '98101'))
+        eq_(locality('1 Main St, Washington'), (None, 'WA', None))
+        eq_(locality('1 Main St, New York, New York'), ('New York', 'NY', None))
+        eq_(locality('7 Oak Ave Rear'), (None, None, None))
+        eq_(locality(''), (None, None, None))
+        eq_(locality('1 Main St, Apt 5, NV 89502'), (None, 'NV', '89502'))
+
+        #city words are not street types
+        def street_city(addr):
+            res = parser.parse_locality(addr)
+            return res['street_name'], res['street_type'], res['city']
+        for city, state in (('Fort Lauderdale', 'FL 33301'), ('Long Beach', 'CA 90802'),
+                            ('Colorado Springs', 'CO 80903'), ('Grand Rapids', 'MI 49503'),
+                            ('Beverly Hills', 'CA 90210'), ('Menlo Park', 'CA 94025'),
+                            ('Sioux Falls', 'SD 57104'), ('New Haven', 'CT 06510')):
+            eq_(street_city('100 Main St, %s, %s' % (city, state)), ('Main', 'St', city))
+        eq_(street_city('9 Elm St, Fort Worth, TX 76102'), ('Elm', 'St', 'Fort Worth'))
+        eq_(street_city('1 Main Street, Lake Forest, IL 60045'), ('Main', 'Street', 'Lake Forest'))
+        eq_(street_city('100 Broadway, New York, NY 10001'), ('Broadway', None, 'New York'))
+        eq_(street_city('100 Main St, Apt 5, Reno, NV 89502'), ('Main', 'St', 'Reno'))
+
+    def test_parse_any(self):
+        parser = self.addr_parser
+        eq_(parser.parse_any('P.O. Box 33170'), {'kind': 'po_box', 'box': '33170', 'other': None})
+        eq_(parser.parse_any('Post Office Box 5, Reno NV')['other'], 'Reno NV')
+        eq_(parser.parse_any('Rural Route 2, Box 152'),
+            {'kind': 'rural_route', 'route_type': 'RR', 'route': '2', 'box': '152', 'other': None})
+        eq_(parser.parse_any('HC 68')['route_type'], 'HC')
+
+        res = parser.parse_any('Bennet Rd and Main St')
+        eq_(res['kind'], 'intersection')
+        eq_((res['street1']['street_full'], res['street2']['street_full']), ('Bennet Rd', 'Main St'))
+        eq_(parser.classify_address('100 Main St & Co'), 'street')
+
+        addrs = ['Box Elder Ln', 'Post Rd', 'Rural St', '1515 West 22 Street', 'Main St and', '',
+                 'Rock and Roll Blvd, Apt 2', 'Lewis and Clark Trail']
+        for addr in addrs:
+            res = parser.parse_any(addr)
+            eq_(res.pop('kind'), 'street')
+            eq_(res, parser.parse(addr))
+
+    def test_shared_across_threads(self):
+        import threading
+        try:
+            from concurrent.futures import ThreadPoolExecutor
+        except ImportError: #python 2 without the futures backport
+            ThreadPoolExecutor = None
+        addrs = ['%d West %d Street, Apt %d' % (i, i % 97, i % 13) for i in range(3000)]
+        addrs += ['One Union Square', '33 1/2 W 42nd St.', 'P.O. Box 12', '']
+        expected = [self.addr_parser.parse(a) for a in addrs]
+        formatter = StreetAddressFormatter()
+        expected_streets = [formatter.format_street(r['street_full'] or '') for r in expected]
+
+        #a tiny token cache is cleared constantly while other threads use it
+        for parser in (StreetAddressParser(token_cache_size=8),
+                       StreetAddressParser(cache_size=100, instrument=True, fuzzy=True)):
+            shared_formatter = StreetAddressFormatter(instrument=True)
+            errors = []
+            def work(offset):
+                try:
+                    for j in range(len(addrs)):
+                        i = (j + offset) % len(addrs)
+                        res = parser.parse(addrs[i])
+                        street = shared_formatter.format_street(res['street_full'] or '')
+                        if res != expected[i] or street != expected_streets[i]:
+                            errors.append(addrs[i])
+                except Exception as e:
+                    errors.append(e)
+            threads = [threading.Thread(target=work, args=(k * 397,)) for k in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            eq_(errors, [])
+
+            if ThreadPoolExecutor is not None:
+                with ThreadPoolExecutor(4) as executor:
+                    eq_(list(parser.parse_many(addrs, executor=executor, chunk_size=50)), expected)
@@ -0,0 +1,64 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import *
+from streetaddress import StreetAddressFormatter, StreetAddressParser
+from streetaddress.streetaddress import DEFAULT_VOCABULARY, parser_fingerprint
+from streetaddress.vocab import Vocabulary, compile_vocabulary, load_vocabulary
+
+REGIONAL = {
+    'name' : 'regional',
+    'extends' : 'default',
+    'suffixes' : {'carrer': 'c', 'wynd': 'wynd'},
+    'suite_types' : ['unit'],
+    'directions' : {'northeast': 'NE'},
+    }
+
+
+class TestVocab(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.source = os.path.join(self.tmp, 'regional.json')
+        with open(self.source, 'w') as f:
+            json.dump(REGIONAL, f)
+
+    def test_default_is_unchanged(self):
+        parser = StreetAddressParser()
+        ok_(parser.vocabulary is DEFAULT_VOCABULARY)
+        eq_(parser.parse('12 Castle Wynd, Unit 4')['street_type'], None)
+
+    def test_compiled_pack_matches_source(self):
+        compiled = os.path.join(self.tmp, 'regional.vocab')
+        vocab = compile_vocabulary(self.source, compiled)
+        loaded = load_vocabulary(compiled)
+        eq_(loaded.to_source(), vocab.to_source())
+        eq_(loaded.fingerprint(), vocab.fingerprint())
+        eq_(load_vocabulary(self.source).to_source(), vocab.to_source())
+        ok_('boulevard' in loaded.street_type_set)
+        ok_(parser_fingerprint(loaded) != parser_fingerprint())
+
+        with open(compiled, 'r+b') as f:
+            f.truncate(20)
+        assert_raises(ValueError, load_vocabulary, compiled)
+
+    def test_parser_and_formatter_use_pack(self):
+        vocab = load_vocabulary(self.source)
+        parser = StreetAddressParser(vocabulary=vocab)
+        addr = parser.parse('12 Castle Wynd, Unit 4')
+        eq_(addr['street_name'], 'Castle')
+        eq_(addr['street_type'], 'Wynd')
+        eq_(addr['suite_type'], 'Unit')
+        eq_(addr['suite_num'], '4')
+
+        formatter = StreetAddressFormatter(vocabulary=vocab)
+        eq_(formatter.format_street('Northeast 5 Carrer'), 'NE 5th C')
+        eq_(StreetAddressFormatter().format_street('Northeast 5 Carrer'), 'Northeast 5 Carrer')
+
+    def test_standalone_pack(self):
+        vocab = Vocabulary({'road': 'rd'}, {'one': 1}, ['apt'], {})
+        addr = StreetAddressParser(vocabulary=vocab).parse('One Main Road Apt 2')
+        eq_((addr['house'], addr['street_type'], addr['suite_num']), ('1', 'Road', '2'))